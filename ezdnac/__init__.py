@@ -1,6 +1,7 @@
 from ezdnac.device.device import *
 from ezdnac.dnac.dnac import *
 from ezdnac.template.template import *
+from ezdnac.aio.aio import *
 from ezdnac.excepts import *
 import warnings
 
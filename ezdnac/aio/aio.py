@@ -0,0 +1,219 @@
+from ezdnac.excepts import *
+from ezdnac.utils import *
+from ezdnac.dnac.dnac import Dnac
+from ezdnac.dnac.snapshot import Snapshot
+from ezdnac.device.device import Device
+from ezdnac.template.template import Template
+from ezdnac.template.deployment import DeploymentTracker
+from ezdnac.poll import *
+import concurrent.futures
+import functools
+import itertools
+import inspect
+import asyncio
+
+
+class AsyncBase():
+    """
+    Exposes every method of a wrapped ezdnac object as a coroutine.
+    The blocking call is run in the worker pool of the AsyncDnac, bounded
+    by its semaphore, so many calls can be in flight on one event loop.
+    Generator methods become async iterators, and the cached data sets
+    (inventory, pnp, sites, topology) are wrapped as AsyncSnapshot.
+    """
+    def __init__(self, adnac, obj):
+        self._adnac = adnac
+        self._obj = obj
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._obj, name)
+        if isinstance(attr, Snapshot):
+            return AsyncSnapshot(self._adnac, attr)
+        if not callable(attr):
+            return attr
+
+        if inspect.isgeneratorfunction(attr):
+            @functools.wraps(attr)
+            def generator(*args, **kwargs):
+                return self._adnac.iterate(attr, *args, **kwargs)
+            return generator
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self._adnac.run(attr, *args, **kwargs)
+        return method
+
+
+class AsyncDnac(AsyncBase):
+    def __init__(self, dnac, concurrency=10):
+        """
+        Asyncio counterpart of Dnac.
+
+        Input parameters
+        :dnac (ezdnac Dnac object) = authenticated controller to wrap
+        :concurrency (int) = max number of requests in flight towards this DNAC
+        """
+        self.dnac = dnac
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency)
+        super().__init__(self, dnac)
+
+    @classmethod
+    async def connect(cls, ip, uid, pw=None, concurrency=10, **kwargs):
+        """
+        Authenticates a new Dnac without blocking the event loop. The
+        connection pool is sized after the concurrency unless poolSize is set.
+        """
+        kwargs.setdefault('poolSize', concurrency)
+        loop = asyncio.get_running_loop()
+        dnac = await loop.run_in_executor(
+            None, functools.partial(Dnac, ip, uid, pw, **kwargs))
+        return cls(dnac, concurrency)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs a blocking ezdnac call in the worker pool. Async wrappers given
+        as arguments are replaced by the object they wrap.
+        """
+        args = [unwrap(arg) for arg in args]
+        kwargs = {key: unwrap(value) for key, value in kwargs.items()}
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs))
+
+    async def restcall(self, method, endpoint, **kwargs):
+        return await arestcall(method, self, endpoint, **kwargs)
+
+    async def iterate(self, func, *args, batch=500, **kwargs):
+        """
+        Async iterator over what the blocking iterator func(*args, **kwargs)
+        yields. The items are pulled batch at a time in the worker pool,
+        so the requests made while iterating stay off the event loop.
+        """
+        iterator = await self.run(lambda *args, **kwargs: iter(func(*args, **kwargs)),
+                                  *args, **kwargs)
+        while True:
+            items = await self.run(lambda: list(itertools.islice(iterator, batch)))
+            if not items:
+                return
+            for item in items:
+                yield item
+
+    def iter_devices(self, *args, **kwargs):
+        """
+        Async iterator counterpart of Dnac.iter_devices.
+        """
+        return self.iterate(self.dnac.iter_devices, *args, **kwargs)
+
+    def iter_pnp_devices(self, *args, **kwargs):
+        """
+        Async iterator counterpart of Dnac.iter_pnp_devices.
+        """
+        return self.iterate(self.dnac.iter_pnp_devices, *args, **kwargs)
+
+    async def device(self, **kwargs):
+        """
+        Returns an AsyncDevice, kwargs as for Device (id, sn or hostname).
+        """
+        device = await self.run(Device, self.dnac, **kwargs)
+        return AsyncDevice(self, device)
+
+    async def template(self, **kwargs):
+        """
+        Returns an AsyncTemplate, kwargs as for Template (all, id or name).
+        """
+        template = await self.run(Template, self.dnac, **kwargs)
+        return AsyncTemplate(self, template)
+
+    async def track_deployments(self, deployments, timeout=None, backoff=None):
+        """
+        Async iterator yielding (deploymentId, data) as each deployment
+        finishes, see DeploymentTracker.
+        """
+        tracker = DeploymentTracker(self.dnac, deployments)
+
+        async def status(deploymentId):
+            return await self.run(tracker.status, deploymentId)
+
+        completions = apoll(tracker.deploymentIds, status, tracker.finished,
+                            backoff=backoff, timeout=timeout, key=tracker.progress)
+        async for deploymentId, data in completions:
+            yield deploymentId, data
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.dnac.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+
+class AsyncDevice(AsyncBase):
+    """
+    Asyncio counterpart of Device, created with AsyncDnac.device().
+    """
+    @property
+    def device(self):
+        return self._obj
+
+    async def collectionStatus(self):
+        return await self._adnac.run(lambda: self._obj.collectionStatus)
+
+    # Device.lazyAttributes are fetched on first access, so they are
+    # awaited here instead of being read on the event loop
+    async def interfaces(self):
+        return await self._adnac.run(lambda: self._obj.interfaces)
+
+    async def modules(self):
+        return await self._adnac.run(lambda: self._obj.modules)
+
+    async def stackcount(self):
+        return await self._adnac.run(lambda: self._obj.stackcount)
+
+
+class AsyncSnapshot(AsyncBase):
+    """
+    Asyncio counterpart of the cached data sets. Reading one may fetch it
+    from DNAC, so properties are coroutines too, ex:
+    await adnac.inventory.devices()
+    """
+    def __getattr__(self, name):
+        if isinstance(getattr(type(self._obj), name, None), property):
+            async def read():
+                return await self._adnac.run(getattr, self._obj, name)
+            return read
+        return super().__getattr__(name)
+
+
+class AsyncTemplate(AsyncBase):
+    """
+    Asyncio counterpart of Template, created with AsyncDnac.template().
+    """
+    @property
+    def template(self):
+        return self._obj
+
+
+def unwrap(obj):
+    if isinstance(obj, AsyncBase):
+        return obj._obj
+    return obj
+
+
+async def arestcall(method, adnac, endpoint, **kwargs):
+    """
+    Awaitable restcall, see ezdnac.utils.restcall.
+
+    attributes
+    :adnac (ezdnac AsyncDnac obj)
+    """
+    return await adnac.run(restcall, method, adnac.dnac, endpoint, **kwargs)
@@ -75,7 +75,7 @@ def pnpq():
 	click.secho("Retrieving the devices in PnP queue.")
 		
 	deviceList = []
-	devices = dnac.getPnpDevices()
+	devices = dnac.iter_pnp_devices(prefetch=True)
 
 	for device in devices:
 		dev = device['deviceInfo']
@@ -94,10 +94,8 @@ def pnpq():
 @show.command()
 def inventory():
 	initDnac()
-	data = dnac.getAllDevices()
-	
 	deviceList = []
-	for device in data['response']:
+	for device in dnac.iter_devices(prefetch=True):
 		hostname = device['hostname']
 		serialNumber = device['serialNumber']
 		mac = device['macAddress']
@@ -123,19 +121,20 @@ def neighbors():
 	device = ezdnac.device(dnac, sn=serialNumber)
 	click.secho("Retrieving the neighbors for device with serial: " + serialNumber)
 
-	neighbors = device.getTopology()
+	neighbors = device.getConnections()
 
 	topo = []
 	if len(neighbors) == 0:
 		print ("No neighbors!")
 	else:
+		# Resolve every neighbor hostname in one go
+		hostnames = dnac.names_for_ids([neighbor['remotenode'] for neighbor in neighbors])
 		for neighbor in neighbors:
 			neihgId = neighbor['remotenode']
 			neighIntf = neighbor['remoteif']
-			localIntf = neighbor['sourceif']
-			neig = ezdnac.device(dnac, id=neihgId)
+			localIntf = neighbor['localif']
 			
-			linkData = [localIntf, neig.hostname, neighIntf]
+			linkData = [localIntf, hostnames[neihgId], neighIntf]
 
 			topo.append(linkData)
 			
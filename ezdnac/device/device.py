@@ -1,7 +1,7 @@
 from ezdnac.excepts import *
 from ezdnac.utils import *
+from ezdnac.device.record import DeviceRecord
 import requests
-import json
 import re
 import os
 
@@ -16,10 +16,21 @@ class Device():
         self.deploymentId = None
         self.executionId = None
         self.taskId = None
+        self.record = None
 
         PNPdevice = None
         INVdevice = None
 
+        # Prefetched inventory or pnp records, no need to ask DNAC
+        if 'record' in kwargs:
+            self.initMethod = 'record'
+            self.loadRecord(kwargs['record'])
+            return
+        if 'pnp' in kwargs:
+            self.initMethod = 'pnp'
+            self.loadPnp(kwargs['pnp'])
+            return
+
         if 'id' in kwargs:
             self.id = kwargs['id']
             self.initMethod = 'id'
@@ -63,51 +74,118 @@ class Device():
                     raise ezDNACError('device not found by serial Number')
 
         if INVdevice is not None:
-            self.state = "Provisioned"
-            self.id = INVdevice['id']
-            self.platform = INVdevice['platformId']
-            for key, value in INVdevice.items():
-                setattr(self, key, value)
-
+            self.loadInventory(INVdevice)
 
         # If device is found in pnp inventory, populate it
         if PNPdevice is not None:
-            self.id = PNPdevice['id']
-            for key, value in PNPdevice['deviceInfo'].items():
-                setattr(self, key, value)
-
-
-            # If stack, check first switch
-            if 'stackInfo' in PNPdevice['deviceInfo']:
-                if 'stackMemberList' in PNPdevice['deviceInfo']['stackInfo']:
-                    if len(PNPdevice['deviceInfo']['stackInfo']['stackMemberList']) > 1:
-
-                        self.hostname = PNPdevice['deviceInfo']['name']
-                        self.id = PNPdevice['id']
-                        self.softwareType = PNPdevice['deviceInfo']['agentType']
-                        self.state = PNPdevice['deviceInfo']['state']
-                        self.platform = PNPdevice['deviceInfo']['pid']
-
-                        # Some attributes is picked from first switch in stack.
-                        stack1 = PNPdevice['deviceInfo']['stackInfo']['stackMemberList'][0]
-                        self.softwareVersion = stack1['softwareVersion']
-
-                else:
-                    self.id = PNPdevice['id']
-                    self.state = PNPdevice['deviceInfo']['state']
-                    self.hostname = PNPdevice['deviceInfo']['name']
-                    self.platform = PNPdevice['deviceInfo']['pid']
-                    self.softwareVersion = PNPdevice['deviceInfo']['imageVersion']
-                    self.softwareType = PNPdevice['deviceInfo']['agentType']
-
-
-                try:
-                    httpHeaders = PNPdevice['deviceInfo']['httpHeaders']
-                    for header in httpHeaders:
-                        if header['key'] == 'clientAddress':
-                            self.ip = header['value']
-                except:
-                    pass
+            self.loadPnp(PNPdevice)
+
+    @classmethod
+    def from_inventory(cls, dnac, record):
+        """
+        Returns a Device built from an inventory device already fetched,
+        without any call to DNAC.
+
+        Inputs:
+        dnac (obj) ezdnac dnac object
+        record (dict or DeviceRecord) a device as returned by network-device
+        """
+        return cls(dnac, record=record)
+
+    @classmethod
+    def from_pnp(cls, dnac, record):
+        """
+        Returns a Device built from a pnp device already fetched,
+        without any call to DNAC.
+
+        Inputs:
+        dnac (obj) ezdnac dnac object
+        record (dict) a device as returned by onboarding/pnp-device
+        """
+        return cls(dnac, pnp=record)
+
+    def loadRecord(self, record):
+        """
+        Wraps an inventory record, its attributes are read from it on demand.
+        """
+        if not isinstance(record, DeviceRecord):
+            record = DeviceRecord(record)
+        self.record = record
+        self.state = "Provisioned"
+        self.id = record.id
+        self.hostname = record.hostname
+        self.serialNumber = record.serialNumber
+        self.platform = record.platformId
+        self.ip = record.managementIpAddress
+
+    def loadInventory(self, INVdevice):
+        self.state = "Provisioned"
+        self.id = INVdevice['id']
+        self.platform = INVdevice['platformId']
+        self.ip = INVdevice.get('managementIpAddress')
+        for key, value in INVdevice.items():
+            setattr(self, key, value)
+
+    def loadPnp(self, PNPdevice):
+        self.id = PNPdevice['id']
+        deviceInfo = PNPdevice['deviceInfo']
+        for key, value in deviceInfo.items():
+            setattr(self, key, value)
+
+        # If stack, check first switch
+        if 'stackInfo' in deviceInfo:
+            if 'stackMemberList' in deviceInfo['stackInfo']:
+                if len(deviceInfo['stackInfo']['stackMemberList']) > 1:
+
+                    self.hostname = deviceInfo['name']
+                    self.softwareType = deviceInfo['agentType']
+                    self.state = deviceInfo['state']
+                    self.platform = deviceInfo['pid']
+
+                    # Some attributes is picked from first switch in stack.
+                    stack1 = deviceInfo['stackInfo']['stackMemberList'][0]
+                    self.softwareVersion = stack1['softwareVersion']
+
+            else:
+                self.state = deviceInfo['state']
+                self.hostname = deviceInfo['name']
+                self.platform = deviceInfo['pid']
+                self.softwareVersion = deviceInfo['imageVersion']
+                self.softwareType = deviceInfo['agentType']
+
+
+            try:
+                httpHeaders = deviceInfo['httpHeaders']
+                for header in httpHeaders:
+                    if header['key'] == 'clientAddress':
+                        self.ip = header['value']
+            except:
+                pass
+
+    # Attributes costing extra calls, fetched on first use by these methods
+    lazyAttributes = {
+        'modules': 'getModules',
+        'stackcount': 'getModules',
+        'interfaces': 'getInterfaces',
+    }
+
+    def __getattr__(self, name):
+        if name.startswith('_') or 'dnac' not in self.__dict__:
+            raise AttributeError(name)
+
+        if name in self.lazyAttributes:
+            getattr(self, self.lazyAttributes[name])()
+            if name in self.__dict__:
+                return self.__dict__[name]
+
+        # Attributes not copied onto the device are read from its record
+        record = self.__dict__.get('record')
+        if record is None:
+            raise AttributeError(name)
+        try:
+            return getattr(record, name)
+        except AttributeError:
+            raise AttributeError(name) from None
 
     @property
     def collectionStatus(self):
@@ -142,46 +220,14 @@ class Device():
     def getInterfaces(self):
         endpoint = f"interface/network-device/{self.id}"
         data = restcall('GET', self.dnac, endpoint)
+        self.interfaces = data.get('response')
         return data
 
     def getTopology(self):
-        ret = []
-        endpoint = "topology/physical-topology/"
-        data = restcall('GET', self.dnac, endpoint)
-        connections = {}
-        links = []
-        for link in data['response']['links']:
-            try:
-                connections['sourcenode'] = link['source']
-                connections['remotenode'] = link['target']
-                connections['sourceif'] = link['startPortName']
-                connections['remoteif'] = link['endPortName']
-                links.append(dict(connections))
-            except:
-                pass
-        ret = links
-        return ret
+        return self.dnac.topology.links
 
     def getConnections(self):
-        ret = []
-        endpoint = "topology/physical-topology/"
-        data = restcall('GET', self.dnac, endpoint)
-        connections = {}
-        links = []
-        for link in data['response']['links']:
-            if link['source'] == self.id:
-                print(link)
-                connections['remotenode'] = link['target']
-                connections['remoteif'] = link['endPortName']
-                connections['localif'] = link['startPortName']
-                links.append(dict(connections))
-            elif link['target'] == self.id:
-                connections['remotenode'] = link['source']
-                connections['remoteif'] = link['startPortName']
-                connections['localif'] = link['endPortName']
-                links.append(dict(connections))
-        ret = links
-        return ret
+        return self.dnac.topology.connections(self.id)
 
     def deployTemplate(self, template):
         """
@@ -194,9 +240,6 @@ class Device():
         'message': (str)
         }
         """
-        data = {}
-        data['deploymentId'] = None
-        data['message'] = None
         endpoint = "template-programmer/template/deploy"
 
         payload = {
@@ -212,46 +255,9 @@ class Device():
 
         response = restcall('POST', self.dnac, endpoint, jsondata=payload)
 
-
-        # If error occurs, no id
-        if 'response' in response and 'errorCode' in response['response']:
-            data['deploymentId'] = None
-            data['message'] = response['response']
-            data['deployed'] = False
-            return data
-
-        # This is how the id should be found, if the API wasnt broken.
-        if 'deploymentId' in response and type(response['deploymentId']) is int:
-            data['deploymentId'] = response['deploymentId']
-            data['message'] = 'Id found in response'
-            data['deployed'] = True
-            self.deploymentId = response
-            return data
-
-        # This is how it is solved with regex instead.
-        if 'deploymentId' in response and type(response['deploymentId']) !=  int:
-            data['message'] = 'Id found with regex, broken response'
-
-            # Testing if id is in response:
-            resultRegex = (re.findall(r'Template Deployemnt Id.*', response['deploymentId']))
-
-            if len(resultRegex) is not 0:
-                Id = str(resultRegex).strip("['Template Deployemnt Id: ]")
-                if resultRegex is not None:
-                    data['deploymentId'] = Id
-                    data['deployed'] = True
-                    self.deploymentId = data
-                    return data
-
-        # If template was not deployed
-        if re.match(r'.*already deployed with same params.*', response['deploymentId']):
-            data['deploymentId'] = None
-            data['deployed'] = True
-            data['message'] = 'Same version already deployed with same params'
-        else:
-            data['deploymentId'] = None
-            data['deployed'] = False
-            data['message'] = response
+        data = parseDeployment(response)
+        if data['deploymentId'] is not None:
+            self.deploymentId = data
 
         return data
 
@@ -317,24 +323,12 @@ class Device():
         return response
 
     def getNeighbors(self):
-        connections = self.getConnections()
-        neighbors = []
-        for link in connections:
-            if link['remotenode'] in neighbors:
-                continue
-            else:
-                neighbors.append(link['remotenode'])
-        return neighbors
+        return self.dnac.topology.neighbors(self.id)
 
     # return every interface connected to us from specific neighbor
 
     def getNeighborIfs(self, neighbor):
-        connections = self.getConnections()
-        interfaces = []
-        for link in connections:
-            if link['remotenode'] == neighbor:
-                interfaces.append(link['remoteif'])
-        return interfaces
+        return self.dnac.topology.neighbor_ifs(self.id, neighbor)
 
     def getModules(self):
         endpoint = f'network-device/module?deviceId={self.id}'
@@ -351,55 +345,36 @@ class Device():
         return modules
 
     def claimDevice(self, siteId, **kwargs):
+        """
+        Claims this pnp device to a site.
+
+        Inputs:
+        siteId (str) id of the site
+        kwargs['template'] (obj) ezdnac template object, applied with its params
+        kwargs['payload'] (dict) a complete site-claim payload, sent as is
+
+        Returns the response of onboarding/pnp-device/site-claim
+        """
         endpoint = "onboarding/pnp-device/site-claim"
-        configParams = []
 
         if 'payload' in kwargs:
             payload = kwargs['payload']
-
-        elif 'template' in kwargs:
-            template = kwargs['template']
-            for key, value in template.params.items():
-                param = {"key": key, "value": value}
-                configParams.append(param)
-
-            payload = {
-                "siteId": siteId,
-                "deviceId": self.id,
-                "type": "Default",
-                "imageInfo": {
-                    "imageId": "None",
-                    "skip": True
-                },
-                "configInfo": {
-                    "saveToStartUp": True,
-                    "connLossRollBack": True,
-                    "configId": template.id,
-                    "configParameters": configParams}
-            }
         else:
-            payload = {
-                "siteId": siteId,
-                "deviceId": self.id,
-                "type": "Default",
-                "imageInfo": {"imageId": "None", "skip": "true"},
-                "configInfo": {"configId": "", "configParameters": []}
-            }
-
-        print(json.dumps(payload, indent=4))
+            payload = siteClaimPayload(siteId, self.id, template=kwargs.get('template'))
+
         data = restcall('POST', self.dnac, endpoint, jsondata=payload)
-        print(data)
-        try:
-            self.executionId = response['executionId']
-        except:
-            pass
+        if isinstance(data, dict) and 'executionId' in data:
+            self.executionId = data['executionId']
+
+        self.dnac.pnp.invalidate()
+        self.dnac.inventory.invalidate()
         return data
 
     def sync(self):
         baseurl = '/dna/intent/api/v1/'
         endpoint = 'network-device/sync'
-        payload = f'["{self.id}"]\n\n'
-        data = restcall('PUT', self.dnac, endpoint, data=payload, baseurl=baseurl)
+        payload = [self.id]
+        data = restcall('PUT', self.dnac, endpoint, jsondata=payload, baseurl=baseurl)
 
         self.taskId = data.get('response').get('taskId')
         return data
@@ -412,7 +387,7 @@ class Device():
         else:
             return None
 
-        endpoint = f'task/{self.taskId}'
+        endpoint = f'task/{taskId}'
         data = restcall('GET', self.dnac, endpoint)
         return data
 
@@ -424,7 +399,55 @@ class Device():
         else:
             return None
 
-        baseurl = '/dna/platform/management/business-api/v1/'
-        endpoint = f'execution-status/{self.executionId}'
-        data = restcall('GET', self.dnac, endpoint, baseurl=baseurl)
-        return data
+        return self.dnac.executionStatus(executionId)
+
+    def wait(self, timeout=120):
+        """
+        Waits for the last task and execution started on this device,
+        returns {id: result} as Dnac.wait_for.
+        """
+        task_ids = [self.taskId] if self.taskId is not None else []
+        execution_ids = [self.executionId] if self.executionId is not None else []
+        return self.dnac.wait_for(task_ids=task_ids, execution_ids=execution_ids,
+                                  timeout=timeout)
+
+
+def siteClaimPayload(siteId, deviceId, template=None, params=None):
+    """
+    Builds the onboarding/pnp-device/site-claim payload of one device.
+
+    Inputs:
+    siteId (str) id of the site
+    deviceId (str) id of the pnp device
+    template (obj) ezdnac template object, None to claim without config
+    params (dict) template params of this device, default template.params
+    """
+    if template is None:
+        return {
+            "siteId": siteId,
+            "deviceId": deviceId,
+            "type": "Default",
+            "imageInfo": {"imageId": "None", "skip": "true"},
+            "configInfo": {"configId": "", "configParameters": []}
+        }
+
+    if params is None:
+        params = template.params
+    configParams = []
+    for key, value in (params or {}).items():
+        configParams.append({"key": key, "value": value})
+
+    return {
+        "siteId": siteId,
+        "deviceId": deviceId,
+        "type": "Default",
+        "imageInfo": {
+            "imageId": "None",
+            "skip": True
+        },
+        "configInfo": {
+            "saveToStartUp": True,
+            "connLossRollBack": True,
+            "configId": template.id,
+            "configParameters": configParams}
+    }
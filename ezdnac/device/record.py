@@ -0,0 +1,100 @@
+from ezdnac.utils import loads
+import json
+import sys
+
+
+class DeviceRecord():
+    """
+    Compact record of an inventory device, for keeping large inventories
+    in memory. The common fields are slots, with the values repeated
+    across devices interned. Every other key of the inventory payload is
+    kept in one JSON blob decoded when first asked for. The blob holds the
+    values only, their keys are a layout tuple shared by all records with
+    the same keys.
+
+    Records behave as read-only dicts of the payload (get, [], in, items),
+    so they can stand in for the dicts returned by network-device.
+    """
+    fields = ('id', 'hostname', 'serialNumber', 'managementIpAddress',
+              'macAddress', 'platformId', 'softwareType', 'softwareVersion',
+              'family', 'series', 'role', 'reachabilityStatus',
+              'collectionStatus', 'type', 'description', 'vendor',
+              'managementState', 'deviceSupportLevel', 'roleSource',
+              'collectionInterval', 'inventoryStatusDetail', 'instanceTenantId')
+
+    # Fields with few distinct values, shared between records
+    internedFields = ('platformId', 'softwareType', 'softwareVersion',
+                      'family', 'series', 'role', 'reachabilityStatus',
+                      'collectionStatus', 'type', 'description', 'vendor',
+                      'managementState', 'deviceSupportLevel', 'roleSource',
+                      'collectionInterval', 'inventoryStatusDetail',
+                      'instanceTenantId')
+
+    # Key tuples of the extra blobs, one per distinct set of keys
+    layouts = {}
+
+    __slots__ = fields + ('_layout', '_extra')
+
+    def __init__(self, device):
+        """
+        Input parameters
+        :device (dict) = a device as returned by network-device
+        """
+        for field in self.fields:
+            value = device.get(field)
+            if field in self.internedFields and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+        layout = tuple(key for key in device if key not in self.fields)
+        if layout:
+            self._layout = self.layouts.setdefault(layout, layout)
+            values = [device[key] for key in layout]
+            self._extra = json.dumps(values, separators=(',', ':')).encode()
+        else:
+            self._layout = ()
+            self._extra = None
+
+    def extra(self):
+        """
+        Returns the rarely used attributes as a dict.
+        """
+        if self._extra is None:
+            return {}
+        return dict(zip(self._layout, loads(self._extra)))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        extra = self.extra()
+        if name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            return getattr(self, key)
+        return self.extra()[key]
+
+    def __contains__(self, key):
+        return key in self.fields or key in self.extra()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.fields) + list(self.extra())
+
+    def items(self):
+        return self.to_dict().items()
+
+    def to_dict(self):
+        device = {field: getattr(self, field) for field in self.fields}
+        device.update(self.extra())
+        return device
+
+    def __repr__(self):
+        return f"DeviceRecord(id={self.id!r}, hostname={self.hostname!r})"
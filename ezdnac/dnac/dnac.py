@@ -1,9 +1,20 @@
 from ezdnac.excepts import *
 from ezdnac.utils import *
-import requests
-import json
-import re
-import os
+from ezdnac.template.sync import pullTemplates, pushTemplates
+from ezdnac.poll import *
+from ezdnac.ratelimit import RateLimiter
+from ezdnac.retry import RetryPolicy
+from ezdnac.dnac.inventory import Inventory
+from ezdnac.dnac.topology import Topology
+from ezdnac.dnac.pnp import PnpQueue
+from ezdnac.dnac.sites import SiteCache
+from ezdnac.dnac.token import TokenManager
+from ezdnac.device.record import DeviceRecord
+from ezdnac.device.device import Device, siteClaimPayload
+from ezdnac.template.deployment import DeploymentTracker
+import concurrent.futures
+import urllib.parse
+import time
 
 class Dnac:
     def __init__(self, ip, uid, pw=None, **kwargs):
@@ -33,67 +44,74 @@ class Dnac:
             self.authToken = kwargs['authToken']
             authToken = kwargs['authToken']
         # Timeout
-        if self.timeout is None:
-            try:
-                timeout = kwargs['timeout']
-                self.timeout = timeout
-            except KeyError:
-                timeout = 5
-                self.timeout = timeout
-            else:
-                self.timeout = 5
+        if 'timeout' in kwargs:
+            self.timeout = kwargs['timeout']
+        # Retries of failed calls
+        if 'retry' in kwargs:
+            self.retry = kwargs['retry']
+        else:
+            self.retry = RetryPolicy()
+        # Connection pool, shared by every call made through this object
+        if 'poolSize' in kwargs:
+            self.poolSize = kwargs['poolSize']
+        else:
+            self.poolSize = 10
+        self.session = create_session(self.poolSize)
+        # Client side rate limiting, per endpoint family
+        if 'rateLimiter' in kwargs:
+            self.limiter = kwargs['rateLimiter']
+        else:
+            self.limiter = RateLimiter(maxConcurrency=self.poolSize)
+        # Inventory snapshot used for serial/hostname/id lookups
+        if 'inventoryTtl' in kwargs:
+            self.inventory = Inventory(self, ttl=kwargs['inventoryTtl'])
+        else:
+            self.inventory = Inventory(self)
+        # Pnp queue used for serial lookups of unclaimed devices
+        if 'pnpTtl' in kwargs:
+            self.pnp = PnpQueue(self, ttl=kwargs['pnpTtl'])
+        else:
+            self.pnp = PnpQueue(self)
+        # Site hierarchy used for site name lookups
+        if 'siteTtl' in kwargs:
+            self.sites = SiteCache(self, ttl=kwargs['siteTtl'])
+        else:
+            self.sites = SiteCache(self)
+        # Physical topology shared by the Device neighbor methods
+        if 'topologyTtl' in kwargs:
+            self.topology = Topology(self, ttl=kwargs['topologyTtl'])
+        else:
+            self.topology = Topology(self)
+        # Token renewal
+        if 'tokenLifetime' in kwargs:
+            self.tokens = TokenManager(self, lifetime=kwargs['tokenLifetime'])
+        else:
+            self.tokens = TokenManager(self)
         # Auth
         self.auth()
 
+    def close(self):
+        """
+        Closes the pooled connections towards DNAC.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
     def auth(self):
         if self.authToken is None:
-            print("Authenticating..")
-            # authenticate with username/password and populate token
-            AuthURL = "https://" + self.ip + ":" + \
-                self.port + self.authBaseUrl + "auth/token"
-            headers = {}
-            try:
-                response = requests.post(AuthURL, headers=headers, verify=self.verifySSL, auth=(
-                    self.uid, self.pw), timeout=self.timeout)
-            except:
-                print(
-                    "Error: Timeout connection to DNA-C. Most likely a network reachability issue")
-                exit()
-            data = json.loads(response.text)
-            if 'error' in data:
-                print (data['error'])
-                exit()
-            else:
-                print ("Login Success")
-            authToken = (data['Token'])
-            self.authToken = authToken
-            return self.authToken
+            return self.tokens.refresh()
         elif self.authToken is not None:
             print ("Reusing existing key..")
             return self.authToken
 
     def reauth(self):
-        print("Authenticating..")
-        # authenticate with username/password and populate token
-        AuthURL = "https://" + self.ip + ":" + \
-            self.port + self.authBaseUrl + "auth/token"
-        headers = {}
-        try:
-            response = requests.post(AuthURL, headers=headers, verify=self.verifySSL, auth=(
-                self.uid, self.pw), timeout=self.timeout)
-        except:
-            print(
-                "Error: Timeout connection to DNA-C. Most likely a network reachability issue")
-            exit()
-        data = json.loads(response.text)
-        if 'error' in data:
-            print (data['error'])
-            exit()
-        else:
-            print ("Login Success")
-        authToken = (data['Token'])
-        self.authToken = authToken
-        return self.authToken
+        return self.tokens.refresh()
 
     def taskStatus(self, **kwargs):
         try:
@@ -109,20 +127,223 @@ class Dnac:
         data = restcall('GET', self, endpoint)
         return data['response']
 
+    def executionStatus(self, id):
+        baseurl = '/dna/platform/management/business-api/v1/'
+        endpoint = f'execution-status/{id}'
+        data = restcall('GET', self, endpoint, baseurl=baseurl)
+        return data
+
+    def wait_for(self, task_ids=None, execution_ids=None, timeout=120,
+                 backoff=None, workers=10):
+        """
+        Waits until every task and execution is finished, polling them
+        concurrently with backoff.
+
+        Input parameters
+        :task_ids (list) = ids returned as taskId
+        :execution_ids (list) = ids returned as executionId
+        :timeout (float) = seconds before giving up, unfinished ids are
+            returned with 'finished': False
+        :backoff (ezdnac Backoff obj) = polling delays
+        :workers (int) = max number of status requests in flight
+
+        Returns (dict) {id: result}, see utils.parseTask and utils.parseExecution
+        """
+        kinds = {}
+        for taskId in task_ids or []:
+            kinds[taskId] = 'task'
+        for executionId in execution_ids or []:
+            kinds[executionId] = 'execution'
+
+        def fetch(id):
+            if kinds[id] == 'task':
+                return parseTask(restcall('GET', self, f'task/{id}'))
+            return parseExecution(self.executionStatus(id))
+
+        def progress(result):
+            return (result.get('progress'), result.get('status'))
+
+        results = {}
+        completions = poll(kinds, fetch, lambda result: result['finished'],
+                           backoff=backoff, timeout=timeout, workers=workers,
+                           key=progress)
+        for id, result in completions:
+            if result is None:
+                result = {'finished': False, 'isError': False, 'response': None}
+            elif isinstance(result, Exception):
+                result = {'finished': False, 'isError': True, 'response': result}
+            results[id] = result
+        return results
+
     # Get the selected device ID from serial:
 
     def getAllDevices(self):
-        endpoint = "network-device/"
-        data = restcall('GET', self, endpoint)
+        data = {'response': list(self.iter_devices())}
 
         return data
 
+    def iter_devices(self, page_size=500, filters=None, prefetch=False):
+        """
+        Yields every inventory device, fetched page_size at a time.
+
+        Input parameters
+        :page_size (int) = devices per request, 500 is the API maximum
+        :filters (dict) = query filters ex: {'family': 'Switches and Hubs'}
+        :prefetch (bool) = fetch the next page while the current is consumed
+        """
+        endpoint = "network-device"
+        return paginate(self, endpoint, page_size=page_size, filters=filters,
+                        prefetch=prefetch)
+
+    def iter_records(self, page_size=500, filters=None, prefetch=True):
+        """
+        Yields every inventory device as a compact DeviceRecord, arguments
+        as for iter_devices.
+        """
+        for device in self.iter_devices(page_size=page_size, filters=filters,
+                                        prefetch=prefetch):
+            yield DeviceRecord(device)
+
+    def resolve_devices(self, sns=None, hostnames=None, ids=None):
+        """
+        Finds many devices at once. The inventory and, if any serial is not
+        in it, the pnp queue are fetched once each and joined against.
+
+        Input parameters
+        :sns (list) = serial numbers, searched in inventory then the pnp queue.
+            Every member of a stack is matched.
+        :hostnames (list) = hostnames, exact or prefix as in getInventoryDevies
+        :ids (list) = inventory device ids
+
+        Returns data (dict):
+        {
+        'found': {sn/hostname/id: Device},
+        'notFound': [sn/hostname/id]
+        }
+        """
+        data = {'found': {}, 'notFound': []}
+
+        for deviceId in ids or []:
+            record = self.inventory.by_id(deviceId)
+            if record is not None:
+                data['found'][deviceId] = Device.from_inventory(self, record)
+            else:
+                data['notFound'].append(deviceId)
+
+        for hostname in hostnames or []:
+            record = self.inventory.by_hostname(hostname)
+            if record is not None:
+                data['found'][hostname] = Device.from_inventory(self, record)
+            else:
+                data['notFound'].append(hostname)
+
+        missing = []
+        for serialNumber in sns or []:
+            record = self.inventory.by_serial(serialNumber)
+            if record is not None:
+                data['found'][serialNumber] = Device.from_inventory(self, record)
+            else:
+                missing.append(serialNumber)
+
+        # Serials not in inventory, try the pnp queue
+        for serialNumber in missing:
+            pnpDevice = self.pnp.by_serial(serialNumber)
+            if pnpDevice is not None:
+                data['found'][serialNumber] = Device.from_pnp(self, pnpDevice)
+            else:
+                data['notFound'].append(serialNumber)
+
+        return data
+
+    def sync_devices(self, ids, chunk_size=100, wait=False, timeout=600,
+                     backoff=None):
+        """
+        Resyncs many inventory devices, sending chunk_size ids per request.
+
+        Input parameters
+        :ids (list) = device ids
+        :chunk_size (int) = ids per sync request
+        :wait (bool) = wait for the sync tasks, then until the devices
+            are no longer synchronizing
+        :timeout (float) = seconds to wait for the devices
+        :backoff (ezdnac Backoff obj) = delays between inventory polls
+
+        Returns data (dict):
+        {
+        'taskIds': [taskId] one per chunk sent,
+        'failed': [{'ids': [deviceId], 'response': error response or exception}]
+            one per chunk refused,
+        'tasks': {taskId: result} as wait_for, if wait is set,
+        'collectionStatus': {deviceId: collectionStatus} of the devices
+            synced, if wait is set
+        }
+        """
+        baseurl = '/dna/intent/api/v1/'
+        endpoint = 'network-device/sync'
+        ids = list(ids)
+        data = {'taskIds': [], 'failed': [], 'tasks': None, 'collectionStatus': None}
+
+        synced = []
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            try:
+                response = restcall('PUT', self, endpoint, jsondata=chunk, baseurl=baseurl)
+            except Exception as e:
+                response = e
+
+            taskId = None
+            if isinstance(response, dict) and isinstance(response.get('response'), dict):
+                taskId = response['response'].get('taskId')
+            if taskId is None:
+                data['failed'].append({'ids': chunk, 'response': response})
+                continue
+            data['taskIds'].append(taskId)
+            synced.extend(chunk)
+
+        if wait:
+            deadline = time.monotonic() + timeout
+            data['tasks'] = self.wait_for(task_ids=data['taskIds'], timeout=timeout,
+                                          backoff=backoff)
+            data['collectionStatus'] = self.wait_collection(
+                synced, timeout=max(deadline - time.monotonic(), 0), backoff=backoff)
+
+        self.inventory.invalidate()
+        return data
+
+    def wait_collection(self, ids, timeout=600, backoff=None, chunk_size=100):
+        """
+        Polls the inventory, chunk_size devices per request, until no device
+        in ids is synchronizing anymore.
+
+        Returns (dict) {deviceId: collectionStatus}, with the last known
+        status for devices still synchronizing at timeout.
+        """
+        if backoff is None:
+            backoff = Backoff()
+        runningStates = ['In Progress', 'Synchronizing']
+        deadline = time.monotonic() + timeout
+
+        status = dict.fromkeys(ids)
+        pending = list(status)
+        delay = None
+        while pending:
+            for i in range(0, len(pending), chunk_size):
+                for device in self.devicesForIds(pending[i:i + chunk_size]):
+                    if device is not None and device.get('id') in status:
+                        status[device['id']] = device.get('collectionStatus')
+
+            pending = [deviceId for deviceId in pending
+                       if status[deviceId] in runningStates]
+            if not pending or time.monotonic() >= deadline:
+                break
+            delay = backoff.next(delay)
+            time.sleep(min(backoff.sleeptime(delay), max(deadline - time.monotonic(), 0)))
+        return status
+
     def id_from_serial(self, serialNumber):
-        devices = self.getAllDevices()
-        for device in devices.get('response'):
-            if serialNumber in device.get('serialNumber'):
-                deviceId = device.get('id')
-                return deviceId
+        device = self.inventory.by_serial(serialNumber)
+        if device is not None:
+            return device.get('id')
 
         return None
 
@@ -130,13 +351,132 @@ class Dnac:
         """
         Return a the name of a device in string format
         """
-        devices = self.getAllDevices().get('response')
-        for device in devices:
-            if id == device.get('id'):
-                hostname = device.get('hostname')
-                return hostname
+        device = self.inventory.by_id(id)
+        if device is not None:
+            return device.get('hostname')
         return None
 
+    def names_for_ids(self, ids, chunk_size=100) -> dict:
+        """
+        Return the hostname of every device id in ids, as {id: hostname}.
+        Names are taken from the node labels of an already fetched topology,
+        then from an already fetched inventory snapshot. The ids left are
+        asked for in one filtered inventory request per chunk_size ids.
+        Unknown ids map to None.
+        """
+        names = dict.fromkeys(ids)
+
+        if not self.topology.expired:
+            for deviceId in names:
+                node = self.topology.node(deviceId)
+                if node is not None:
+                    names[deviceId] = node.get('label')
+
+        if not self.inventory.expired:
+            for deviceId, hostname in names.items():
+                if hostname is None:
+                    device = self.inventory.by_id(deviceId)
+                    if device is not None:
+                        names[deviceId] = device.get('hostname')
+
+        missing = [deviceId for deviceId, hostname in names.items() if hostname is None]
+        for i in range(0, len(missing), chunk_size):
+            for device in self.devicesForIds(missing[i:i + chunk_size]):
+                if device.get('id') in names:
+                    names[device['id']] = device.get('hostname')
+        return names
+
+    def devicesForIds(self, ids):
+        """
+        Returns the inventory devices with these ids, in a single request.
+        """
+        query = urllib.parse.urlencode({'id': ','.join(ids)})
+        data = restcall('GET', self, f"network-device?{query}")
+        return data.get('response') or []
+
+    def track_deployments(self, deployments, **kwargs):
+        """
+        Returns a DeploymentTracker for the deployments, kwargs as for
+        DeploymentTracker. Iterate over it, or call run(), to wait for them.
+        """
+        return DeploymentTracker(self, deployments, **kwargs)
+
+    def claim_devices(self, siteId, devices, template=None, params=None,
+                      workers=8, wait=True, timeout=900, backoff=None):
+        """
+        Claims many pnp devices to a site, sending up to workers claims at
+        a time, then waits for the claim executions.
+
+        Input parameters
+        :siteId (str) = id of the site
+        :devices (list) = ezdnac device objects or pnp device ids
+        :template (ezdnac Template obj) = onboarding template, None to
+            claim without config
+        :params (dict) = per device template params as {deviceId: params},
+            devices not in it are claimed with the template params
+        :workers (int) = max number of claims in flight
+        :wait (bool) = wait for the claim executions
+        :timeout (float) = seconds to wait for the executions
+        :backoff (ezdnac Backoff obj) = polling delays
+
+        Returns (dict) {deviceId: data}:
+        {
+        'executionId': id(str), None if the claim was refused,
+        'isError': (bool),
+        'status': (str) execution status, None if not waited for,
+        'response': the claim response, or the execution if waited for
+        }
+        """
+        endpoint = "onboarding/pnp-device/site-claim"
+        if params is None:
+            params = {}
+
+        deviceIds = []
+        for device in devices:
+            if isinstance(device, str):
+                deviceIds.append(device)
+            else:
+                deviceIds.append(device.id)
+
+        def claim(deviceId):
+            payload = siteClaimPayload(siteId, deviceId, template=template,
+                                       params=params.get(deviceId))
+            return restcall('POST', self, endpoint, jsondata=payload)
+
+        result = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(claim, deviceId): deviceId for deviceId in deviceIds}
+            for future in concurrent.futures.as_completed(futures):
+                deviceId = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    response = e
+                executionId = None
+                if isinstance(response, dict):
+                    executionId = response.get('executionId')
+                result[deviceId] = {
+                    'executionId': executionId,
+                    'isError': executionId is None,
+                    'status': None,
+                    'response': response,
+                }
+
+        if wait:
+            executions = {data['executionId']: deviceId for deviceId, data in result.items()
+                          if data['executionId'] is not None}
+            done = self.wait_for(execution_ids=list(executions), timeout=timeout,
+                                 backoff=backoff, workers=workers)
+            for executionId, execution in done.items():
+                data = result[executions[executionId]]
+                data['isError'] = execution['isError'] or not execution['finished']
+                data['status'] = execution.get('status')
+                data['response'] = execution['response']
+
+        # Claimed devices leave the pnp queue and join the inventory
+        self.pnp.invalidate()
+        self.inventory.invalidate()
+        return result
 
     def getTemplates(self):
         endpoint = "template-programmer/project"
@@ -161,61 +501,151 @@ class Dnac:
         return data
 
     def getSites(self, **kwargs):
-        try:
-            searchsite = kwargs['site']
-        except:
-            searchsite = None
-        if searchsite == None:
-            url = "https://" + self.ip + ":" + self.port + "/dna/intent/api/v1/site"
-        else:
-            url = "https://" + self.ip + ":" + self.port + \
-                "/dna/intent/api/v1/site?name=" + searchsite + ""
-
-        payload = {}
-        headers = {
-            'x-auth-token': self.authToken,
-            'Content-Type': 'application/json',
-            '__runsync': 'true',
-            '__timeout': '10',
-            '__persistbapioutput': 'true',
+        """
+        Returns every site, or with kwargs['site'] the id of the site
+        with that hierarchy path or name, from the cached site hierarchy.
+        """
+        if 'site' in kwargs and kwargs['site'] is not None:
+            return self.sites.site_id(kwargs['site'])
+
+        return list(self.sites.sites)
+
+    def assign_devices_to_site(self, site, devices, chunk_size=50, wait=True,
+                               timeout=600, backoff=None):
+        """
+        Assigns many inventory devices to a site, sending chunk_size
+        devices per request.
+
+        Input parameters
+        :site (str) = site id, hierarchy path or name
+        :devices (list) = ezdnac device objects or management ips
+        :chunk_size (int) = devices per request
+        :wait (bool) = wait for the assignment executions
+        :timeout (float) = seconds to wait for the executions
+        :backoff (ezdnac Backoff obj) = polling delays
+
+        Returns (dict) {ip: data} where data is the result of the device's
+        chunk. Devices without a management ip are not sent, they are
+        returned under their id with isError set and response None:
+        {
+        'executionId': id(str), None if the request was refused,
+        'isError': (bool),
+        'status': (str) execution status, None if not waited for,
+        'response': the assign response, the exception if the request
+            failed, or the execution if waited for
         }
+        """
+        siteId = self.sites.site_id(site)
+        if siteId is None:
+            raise ezDNACError(f'Site {site} not found.')
 
-        response = requests.request(
-            "GET", url, headers=headers, data=payload, verify=self.verifySSL, timeout=self.timeout)
-        data = json.loads(response.text)
+        baseurl = "/dna/system/api/v1/"
+        endpoint = f"site/{siteId}/device"
 
-        if searchsite != None:
-            for site in data['response']:
-                return site['id']
+        ips = []
+        noIp = []
+        for device in devices:
+            if isinstance(device, str):
+                ips.append(device)
+                continue
+            ip = getattr(device, 'ip', None) or getattr(device, 'managementIpAddress', None)
+            if ip is None:
+                noIp.append(device.id)
+            else:
+                ips.append(ip)
 
-        return data['response']
+        chunks = []
+        for i in range(0, len(ips), chunk_size):
+            chunk = ips[i:i + chunk_size]
+            payload = {"device": [{"ip": ip} for ip in chunk]}
+            try:
+                response = restcall('POST', self, endpoint, baseurl=baseurl, jsondata=payload)
+            except Exception as e:
+                response = e
+
+            executionId = None
+            if isinstance(response, dict):
+                executionId = response.get('executionId')
+            chunks.append((chunk, {
+                'executionId': executionId,
+                'isError': executionId is None,
+                'status': None,
+                'response': response,
+            }))
+
+        if wait:
+            executionIds = [data['executionId'] for chunk, data in chunks
+                            if data['executionId'] is not None]
+            done = self.wait_for(execution_ids=executionIds, timeout=timeout,
+                                 backoff=backoff)
+            for chunk, data in chunks:
+                execution = done.get(data['executionId'])
+                if execution is not None:
+                    data['isError'] = execution['isError'] or not execution['finished']
+                    data['status'] = execution.get('status')
+                    data['response'] = execution['response']
+
+        self.inventory.invalidate()
+
+        result = {}
+        for chunk, data in chunks:
+            for ip in chunk:
+                result[ip] = dict(data)
+        for deviceId in noIp:
+            result[deviceId] = {
+                'executionId': None,
+                'isError': True,
+                'status': None,
+                'response': None,
+            }
+        return result
 
     def getPnpDevices(self, **kwargs):
-        if 'sn in kwargs':
+        """
+        Returns the whole pnp queue, or with kwargs['sn'] the device with
+        that serial number (any stack member), from the cached queue.
+        """
+        if 'sn' in kwargs:
             serialNumber = kwargs['sn']
         else:
             serialNumber = None
 
-        endpoint = "onboarding/pnp-device"
-        payload = {}
-        headers = {
-            'x-auth-token': self.authToken
-        }
-
-        response = restcall('GET', self, endpoint)
-        data = response
-
         if serialNumber is None:
+            data = list(self.iter_pnp_devices(prefetch=True))
+            self.pnp.load(data)
             return data
 
-        else:
-            for device in data:
-                if serialNumber in device['deviceInfo']['serialNumber']:
-                    return device
+        device = self.pnp.by_serial(serialNumber)
+        if device is not None:
+            return device
 
-            # If sn was set, but not found:
-            raise ezDNACError('Device with serial number' +
-                               serialNumber + ' not found in pnp.')
+        # Not in the cached queue, it may have just shown up
+        for device in self.iter_pnp_devices(serialNumber=serialNumber):
+            return device
+
+        # If sn was set, but not found:
+        raise ezDNACError('Device with serial number' +
+                           serialNumber + ' not found in pnp.')
+
+    def iter_pnp_devices(self, page_size=500, serialNumber=None, state=None,
+                         prefetch=False):
+        """
+        Yields the devices of the pnp queue, fetched page_size at a time.
+
+        Input parameters
+        :page_size (int) = devices per request
+        :serialNumber (str) = only the device with this serial number
+        :state (str) = only devices in this state ex: Unclaimed
+        :prefetch (bool) = fetch the next page while the current is consumed
+        """
+        endpoint = "onboarding/pnp-device"
+        filters = {}
+        if serialNumber is not None:
+            filters['serialNumber'] = serialNumber
+        if state is not None:
+            filters['state'] = state
+        return paginate(self, endpoint, page_size=page_size, filters=filters,
+                        prefetch=prefetch, offset=0)
 
     def getInventoryDevies(self, **kwargs):
         # Setting attributes from kwargs
@@ -245,294 +675,51 @@ class Dnac:
 
         # If serialNumber is used
         elif serialNumber is not None:
-            endpoint = "network-device/"
-
-            response = restcall('GET', self, endpoint)
-            data = response['response']
-
-            for device in data:
-                if 'serialNumber' in device:
-                    if device['serialNumber'] is not None:
-                        if serialNumber in device['serialNumber']:
-                            return device
+            device = self.inventory.by_serial(serialNumber)
 
         # If hostname is used
         elif hostname is not None:
-            endpoint = "network-device/"
-            response = restcall('GET', self, endpoint)
-            data = response['response']
-            for device in data:
-                if re.match(rf'{hostname}.*', device['hostname']):
-                    return device
+            device = self.inventory.by_hostname(hostname)
+
+        else:
+            device = None
+
+        if device is not None:
+            return device.to_dict()
         return None
 
 
     def pullTemplates(self, **kwargs):
-        path = ""
-        projectName = None
-        try:
-            projectName = kwargs['project']
-        except:
-            pass
-        try:
-            path = kwargs['path']
-        except:
-            pass
+        """
+        Downloads templates to a local folder.
 
-        endpoint = "template-programmer/project"
+        Input parameters
+        :kwargs['path'] = STRING # local folder, default current folder
+        :kwargs['project'] = STRING # only pull the templates of this project
+        :kwargs['workers'] = INT # templates pulled in parallel, default 8
+        :kwargs['incremental'] = Boolean # skip templates unchanged since last pull, default True
+        """
+        path = kwargs.get('path', "")
+        projectName = kwargs.get('project')
+        workers = kwargs.get('workers', 8)
+        incremental = kwargs.get('incremental', True)
 
-        response = restcall('GET', self, endpoint)
-        templateslist = []
-        # Get the id of interesting templates:
-        for projects in response:
-            if projectName != None:
-                if (projects['name']) == projectName:
-                    for template in projects['templates']:
-                        templates = {}
-                        templates['id'] = template['id']
-                        templateslist.append(templates)
-            else:
-                for template in projects['templates']:
-                    templates = {}
-                    templates['id'] = template['id']
-                    templateslist.append(templates)
-
-
-        for template in templateslist:
-            endpoint = f"template-programmer/template/{template['id']}"
-            print(endpoint)
-            templateData = restcall('GET', self, endpoint)
-
-
-            # Create template path folder if not exists already
-            if not os.path.exists(path):
-                os.mkdir(path)
-
-            # Creates one subfolder per template, containting separate files for parameters and content
-            print(json.dumps(templateData,indent=4))
-
-            templatePath = path + templateData['name']
-            if not os.path.exists(templatePath):
-                os.mkdir(templatePath)
-
-            # Create a file for the actual content:
-            contentsFilename = templatePath + "/" + \
-                templateData['name'] + "_contents.txt"
-            with open(contentsFilename, 'w') as out:
-                templateParams = templateData['templateContent']
-                out.write(str(templateParams))
-
-            # Create a file for all parameters:
-            paramsFilename = templatePath + "/" + \
-                templateData['name'] + "_params.json"
-            with open(paramsFilename, 'w') as out:
-                templateParams = templateData
-                if 'templateContent' in templateParams:
-                    del templateParams['templateContent']
-                out.write(str(json.dumps(templateParams, indent=4)))
-
-        if path == "":
-            path = "local folder"
-        if projectName != None:
-            return "All templates in project: " + projectName + " are synced to: " + path
-        else:
-            return "All templates in all projects are synced to: " + path
+        return pullTemplates(self, path=path, project=projectName, workers=workers,
+                             incremental=incremental)
 
     def pushTemplates(self, **kwargs):
-        path = ""
-        try:
-            path = kwargs['path']
-        except:
-            pass
+        """
+        Uploads local template folders to DNAC.
 
-        # Createa a reference dict for each templatefolder:
-        templatesList = []
-        listdir = os.listdir(path)
-        folders = []
-        for obj in listdir:
-            if not re.match(r"^\.", obj):
-                folders.append(obj)
-
-        for folder in folders:
-            templateDict = {"name": folder}
-            templateName = folder
-            templatePath = path + folder
-
-            for file in os.listdir(path + folder):
-                if re.match(r'.*_params.json', file):
-                    templateDict['paramsFile'] = templatePath + "/" + file
-
-                if re.match(r'.*_contents.txt', file):
-                    templateDict['contentsFile'] = templatePath + "/" + file
-
-            templatesList.append(templateDict)
-
-        # Firest check if template already exists:
-        for template in templatesList:
-
-            # Opening both files
-            # Content from the _content.json file:
-            templateContents = str(open(template['contentsFile'], 'r').read())
-
-            # All parameters from the params file:
-            with open(template['paramsFile']) as templateData:
-                templateFile = json.load(templateData)
-                templateName = templateFile['name']
-                projectName = templateFile['projectName']
-
-                # Check whats already existing, based on project/template tree name
-                endpoint = "template-programmer/project/"
-                data = restcall('GET', self, endpoint)
-                templateExists = False
-                projectExists = False
-                for project in data:
-                    if project['name'] == projectName:
-                        projectExists = True
-                        projectId = project['id']
-                        print ("Project exists: " +
-                               projectName + " - " + projectId)
-
-                        for templates in project['templates']:
-                            if templates['name'] == templateName:
-                                templateId = templates['id']
-                                templateExists = True
-                                print ("Template exists: " +
-                                       templateName + " - " + templateId)
-
-                if projectExists == False:
-                    print ("Creating missing project: " + projectName)
-                    url = "https://" + self.ip + ":" + self.port + \
-                        "/dna/intent/api/v1/template-programmer/project"
-
-                    payload = {
-                        "name": projectName,
-                    }
-                    headers = {
-                        'x-auth-token': self.authToken,
-                        'Content-Type': 'application/json',
-                    }
-                    response = requests.request(
-                        "POST", url, headers=headers, json=payload, verify=self.verifySSL, timeout=self.timeout)
-                    data = json.loads(response.text)
-
-                    # Since the project didn't exist, we need to fetch it's new id.
-                    taskId = data['response']['taskId']
-                    datafromtask = self.taskStatus(id=taskId)
-                    projectId = datafromtask['data']
-
-                if templateExists == False:
-                    print ("Creating missing template: " + templateName)
-
-                    url = "https://" + self.ip + ":" + self.port + \
-                        "/dna/intent/api/v1/template-programmer/project/" + projectId + "/template"
-                    payload = templateFile
-                    # Remove keys, making the payload suitable for new-creation of template. Hence removing id etc.
-                    if 'id' in payload:
-                        del payload['id']
-                    for param in payload['templateParams']:
-                        if 'id' in param:
-                            del param['id']
-
-                    for param in payload['templateParams']:
-                        if 'selection' in param:
-                            del param['selection']
-
-                    payload['templateContent'] = str(templateContents)
-
-                    headers = {
-                        'x-auth-token': self.authToken,
-                        'Content-Type': 'application/json',
-                    }
-                    response = requests.request(
-                        "POST", url, headers=headers, json=payload, verify=self.verifySSL, timeout=self.timeout)
-                    data = json.loads(response.text)
-                    try:
-                        self.taskId = data['response']['taskId']
-                    except:
-                        self.taskId = None
-
-                if templateExists == True:
-                    changed = False
-                    # Since the template exists, PUT the file from directory to make sure the active template is same version.
-                    print ("Template " + templateName +
-                           " already exists, compare data")
-
-                    #Get the current data from dna-C
-                    template_endpoint = f"template-programmer/template/{templateId}"
-                    dnac_template = restcall('GET', self, template_endpoint)
-
-                    # Check if content is matching.
-                    if dnac_template['templateContent'] == templateContents:
-                        print(f"Same Template Content in {templateName}")
-
-                    else:
-                        print(f"Content update in {templateName}, updating.")
-                        changed = True
-                    """
-                    Matching each parameter from the file and compare with the 
-                    one in DNA-C
-                    """
-
-                    # Placing all params in lists
-                    active_params = dnac_template['templateParams']
-                    file_params = templateFile['templateParams']
-
-                    for file_parameter in file_params:
-                        param_differences = []
-                        file_param_name = file_parameter['parameterName']
-
-                        # Remove id from comparison
-                        if 'id' in file_parameter:
-                            del file_parameter['id']
-
-                        for active_param in active_params:
-                            active_param_name = active_param['parameterName']
-
-                            # Remove id from comparison
-                            if 'id' in active_param:
-                                del active_param['id']
-
-                            # For each matching parameter, check all paramsdata:                            
-                            if active_param_name == file_param_name:
-                                for key, value in active_param.items():
-                                    if value != file_parameter[key]:
-                                        param_differences.append((key, value, file_parameter[key]))
-
-                    if len (param_differences) > 0:
-                        changed = True
-                        for param in param_differences:
-                            print(f"Template differs for parameter {param[0]}, live value: {param[1]} file value: {param[2]}")
-
-                    if changed == True:
-                        print("Updating..")
-
-                        # Version template first.
-                        versionEndpoint = "template-programmer/template/version"
-                        versionPayload = {
-                            'comments': 'Updated with EZDNAC',
-                            'templateId': templateId
-                        }
-                        # Restcall for template versioning
-                        restcall('POST', self, versionEndpoint, jsondata=versionPayload)
-
-                        #Update the current template:
-                        templateEndpoint = "template-programmer/template/"
-                        payload = templateFile
-                        payload['id'] = templateId
-
-                        for param in payload['templateParams']:
-                            if 'selection' in param:
-                                del param['selection']
-
-                        payload['templateContent'] = templateContents
-
-                        # Sending the updates to DNA-C
-                        restcall('PUT', self, templateEndpoint, jsondata=payload)
-
-                    # If nothing changed, do nothing
-                    elif changed == False:
-                        print("No parameter updated \nNo update done")
-
-                    print("\r\n")
+        Input parameters
+        :kwargs['path'] = STRING # local folder, as written by pullTemplates
+        :kwargs['force'] = Boolean # compare templates unchanged since last sync too
+        :kwargs['workers'] = INT # templates pushed in parallel, default 8
 
+        Returns (dict) {templateName: error} for the templates that failed
+        """
+        path = kwargs.get('path', "")
+        force = kwargs.get('force', False)
+        workers = kwargs.get('workers', 8)
 
+        return pushTemplates(self, path=path, force=force, workers=workers)
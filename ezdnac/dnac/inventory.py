@@ -0,0 +1,84 @@
+from ezdnac.device.record import DeviceRecord
+from ezdnac.dnac.snapshot import Snapshot
+import bisect
+
+
+class Inventory(Snapshot):
+    def __init__(self, dnac, ttl=300):
+        """
+        Cached snapshot of the DNAC network-device inventory, indexed for
+        lookups without further restcalls.
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :ttl (int) = seconds before the snapshot is fetched again
+        """
+        super().__init__(dnac, ttl)
+
+    def refresh(self):
+        self.load(list(self.dnac.iter_devices(prefetch=True)))
+
+    def load(self, devices):
+        """
+        Builds the indexes from a list of inventory devices, kept as
+        compact DeviceRecords.
+        """
+        devices = [device if isinstance(device, DeviceRecord) else DeviceRecord(device)
+                   for device in devices]
+        index = {
+            'devices': devices,
+            'id': {},
+            'serialNumber': {},
+            'hostname': {},
+            'managementIpAddress': {},
+        }
+        for device in devices:
+            for key in ['id', 'hostname', 'managementIpAddress']:
+                value = device.get(key)
+                if value is not None:
+                    index[key].setdefault(value, device)
+
+            # Stacks list every member serial, comma separated
+            serialNumber = device.get('serialNumber')
+            if serialNumber is not None:
+                for serial in serialNumber.split(','):
+                    index['serialNumber'].setdefault(serial.strip(), device)
+
+        index['sortedHostnames'] = sorted(index['hostname'])
+        self.loaded(index)
+
+    @property
+    def devices(self):
+        return self.snapshot()['devices']
+
+    def by_id(self, deviceId):
+        return self.snapshot()['id'].get(deviceId)
+
+    def by_serial(self, serialNumber):
+        return self.snapshot()['serialNumber'].get(serialNumber.strip())
+
+    def by_ip(self, ip):
+        return self.snapshot()['managementIpAddress'].get(ip)
+
+    def by_hostname(self, hostname):
+        """
+        Returns the device with this exact hostname, or else the first one
+        (in sorted order) whose hostname starts with it.
+        """
+        index = self.snapshot()
+        if hostname in index['hostname']:
+            return index['hostname'][hostname]
+        for match in self.with_prefix(hostname):
+            return match
+        return None
+
+    def with_prefix(self, prefix):
+        """
+        Yields every device whose hostname starts with prefix, sorted by hostname.
+        """
+        index = self.snapshot()
+        hostnames = index['sortedHostnames']
+        i = bisect.bisect_left(hostnames, prefix)
+        while i < len(hostnames) and hostnames[i].startswith(prefix):
+            yield index['hostname'][hostnames[i]]
+            i += 1
@@ -0,0 +1,49 @@
+from ezdnac.dnac.snapshot import Snapshot
+
+
+class PnpQueue(Snapshot):
+    def __init__(self, dnac, ttl=60):
+        """
+        Cached snapshot of the DNAC pnp queue, indexed by id and serial
+        number. Every member of a stack is indexed.
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :ttl (int) = seconds before the queue is fetched again
+        """
+        super().__init__(dnac, ttl)
+
+    def refresh(self):
+        self.load(list(self.dnac.iter_pnp_devices(prefetch=True)))
+
+    def load(self, devices):
+        """
+        Builds the indexes from a list of pnp devices.
+        """
+        index = {
+            'devices': devices,
+            'id': {},
+            'serialNumber': {},
+        }
+        for device in devices:
+            index['id'].setdefault(device['id'], device)
+
+            deviceInfo = device.get('deviceInfo', {})
+            serials = [deviceInfo.get('serialNumber')]
+            for member in deviceInfo.get('stackInfo', {}).get('stackMemberList', []):
+                serials.append(member.get('serialNumber'))
+            for serial in serials:
+                if serial is not None:
+                    index['serialNumber'].setdefault(serial, device)
+
+        self.loaded(index)
+
+    @property
+    def devices(self):
+        return self.snapshot()['devices']
+
+    def by_id(self, deviceId):
+        return self.snapshot()['id'].get(deviceId)
+
+    def by_serial(self, serialNumber):
+        return self.snapshot()['serialNumber'].get(serialNumber)
@@ -0,0 +1,88 @@
+from ezdnac.excepts import *
+from ezdnac.utils import *
+from ezdnac.dnac.snapshot import Snapshot
+
+
+class SiteCache(Snapshot):
+    def __init__(self, dnac, ttl=300):
+        """
+        Cached site hierarchy of DNAC, indexed by id, by hierarchy path
+        ex: Global/Sweden/Stockholm/Building1 and by name.
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :ttl (int) = seconds before the sites are fetched again
+        """
+        super().__init__(dnac, ttl)
+
+    def refresh(self):
+        baseurl = '/dna/intent/api/v1/'
+        headers = {
+            '__runsync': 'true',
+            '__timeout': '10',
+            '__persistbapioutput': 'true',
+        }
+        sites = list(paginate(self.dnac, "site", baseurl=baseurl, headers=headers))
+        self.load(sites)
+
+    def load(self, sites):
+        """
+        Builds the indexes from a list of sites.
+        """
+        index = {
+            'sites': sites,
+            'id': {},
+            'siteNameHierarchy': {},
+            'name': {},
+            'children': {},
+        }
+        for site in sites:
+            index['id'][site['id']] = site
+            if 'siteNameHierarchy' in site:
+                index['siteNameHierarchy'][site['siteNameHierarchy']] = site
+            index['name'].setdefault(site.get('name'), []).append(site)
+            index['children'].setdefault(site.get('parentId'), []).append(site)
+
+        self.loaded(index)
+
+    @property
+    def sites(self):
+        return self.snapshot()['sites']
+
+    def by_id(self, siteId):
+        return self.snapshot()['id'].get(siteId)
+
+    def by_hierarchy(self, siteNameHierarchy):
+        return self.snapshot()['siteNameHierarchy'].get(siteNameHierarchy)
+
+    def by_name(self, name):
+        """
+        Returns every site with this name, ex: all floors named 'Floor 1'.
+        """
+        return list(self.snapshot()['name'].get(name, []))
+
+    def children(self, siteId):
+        return list(self.snapshot()['children'].get(siteId, []))
+
+    def find(self, site):
+        """
+        Returns the site matching an id, a hierarchy path or a name,
+        None if not found. A name shared by several sites raises
+        ezDNACError, use the hierarchy path instead.
+        """
+        found = self.by_id(site) or self.by_hierarchy(site)
+        if found is not None:
+            return found
+
+        sites = self.by_name(site)
+        if len(sites) > 1:
+            raise ezDNACError(f'Site name {site} is ambiguous, use the hierarchy path')
+        if sites:
+            return sites[0]
+        return None
+
+    def site_id(self, site):
+        found = self.find(site)
+        if found is None:
+            return None
+        return found['id']
@@ -0,0 +1,53 @@
+import abc
+import threading
+import time
+
+
+class Snapshot(abc.ABC):
+    def __init__(self, dnac, ttl):
+        """
+        Base of the cached DNAC data sets. Subclasses fetch their data in
+        refresh() and build self.index from it in load().
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :ttl (int) = seconds before the data is fetched again
+        """
+        self.dnac = dnac
+        self.ttl = ttl
+        self.fetched = None
+        self.index = None
+        self.lock = threading.Lock()
+
+    @property
+    def expired(self):
+        if self.fetched is None:
+            return True
+        return time.monotonic() - self.fetched > self.ttl
+
+    def invalidate(self):
+        """
+        Forces the next lookup to fetch the data again.
+        """
+        self.fetched = None
+
+    @abc.abstractmethod
+    def refresh(self):
+        """
+        Fetches the data from DNAC and loads it.
+        """
+
+    def loaded(self, index):
+        self.index = index
+        self.fetched = time.monotonic()
+
+    def snapshot(self):
+        """
+        Returns the current index, fetching the data if expired.
+        Concurrent callers share a single fetch.
+        """
+        if self.expired:
+            with self.lock:
+                if self.expired:
+                    self.refresh()
+        return self.index
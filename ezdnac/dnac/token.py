@@ -0,0 +1,93 @@
+from ezdnac.excepts import *
+from ezdnac.utils import loads
+import threading
+import time
+
+
+class TokenManager():
+    def __init__(self, dnac, lifetime=3600, margin=300):
+        """
+        Keeps the auth token of a Dnac valid. The token is renewed margin
+        seconds before its lifetime ends, or when DNAC rejects it. Threads
+        needing a new token at the same time share a single auth/token call.
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :lifetime (int) = seconds a token is valid, 60 min on DNAC
+        :margin (int) = seconds before expiry the token is renewed
+        """
+        self.dnac = dnac
+        self.lifetime = lifetime
+        self.margin = margin
+        self.issued = None
+        self.lock = threading.Lock()
+
+    @property
+    def canRefresh(self):
+        return self.dnac.pw is not None
+
+    @property
+    def expiring(self):
+        """
+        True if the token is known to be about to expire. The age of a
+        token given to Dnac as authToken is unknown, it is then only
+        renewed when rejected.
+        """
+        if self.issued is None:
+            return False
+        return time.monotonic() - self.issued > self.lifetime - self.margin
+
+    def fetch(self):
+        """
+        Authenticates with username/password and populates the token.
+        """
+        print("Authenticating..")
+        AuthURL = "https://" + self.dnac.ip + ":" + \
+            self.dnac.port + self.dnac.authBaseUrl + "auth/token"
+        # Getting a token changes nothing on DNAC, so it is always retried
+        policy = self.dnac.retry
+        delay = None
+        for attempt in range(policy.retries + 1):
+            try:
+                response = self.dnac.session.post(
+                    AuthURL, headers={}, verify=self.dnac.verifySSL,
+                    auth=(self.dnac.uid, self.dnac.pw), timeout=self.dnac.timeout)
+            except policy.errors as error:
+                if attempt == policy.retries:
+                    raise ezDNACError(
+                        "Timeout connection to DNA-C. Most likely a network reachability issue") from error
+                delay = policy.backoff.next(delay)
+                time.sleep(policy.backoff.sleeptime(delay))
+            else:
+                break
+
+        try:
+            data = loads(response.content)
+        except ValueError:
+            raise ezDNACError(f"Authentication failed, status {response.status_code}")
+        if 'error' in data or 'Token' not in data:
+            raise ezDNACError(data.get('error', data))
+
+        print ("Login Success")
+        self.dnac.authToken = data['Token']
+        self.issued = time.monotonic()
+        return self.dnac.authToken
+
+    def refresh(self, stale=None):
+        """
+        Gets a new token. If stale is given and the current token already
+        differs from it, another thread refreshed it and no call is made.
+        """
+        with self.lock:
+            if stale is not None and self.dnac.authToken != stale:
+                return self.dnac.authToken
+            return self.fetch()
+
+    def ensure(self):
+        """
+        Returns a token, renewing it first if it is about to expire.
+        """
+        token = self.dnac.authToken
+        if self.expiring and self.canRefresh:
+            return self.refresh(stale=token)
+        return token
@@ -0,0 +1,95 @@
+from ezdnac.utils import *
+from ezdnac.dnac.snapshot import Snapshot
+
+
+class Topology(Snapshot):
+    def __init__(self, dnac, ttl=300):
+        """
+        Cached physical topology of DNAC, kept as an adjacency index
+        keyed by node id.
+
+        Input parameters
+        :dnac (ezdnac Dnac object)
+        :ttl (int) = seconds before the topology is fetched again
+        """
+        super().__init__(dnac, ttl)
+
+    def refresh(self):
+        endpoint = "topology/physical-topology/"
+        data = restcall('GET', self.dnac, endpoint)
+        self.load(data['response'])
+
+    def load(self, topology):
+        """
+        Builds the adjacency index from a physical-topology response.
+        Every link is stored once per end, seen from that end.
+        """
+        index = {
+            'nodes': {},
+            'links': [],
+            'adjacency': {},
+        }
+        for node in topology.get('nodes', []):
+            index['nodes'][node['id']] = node
+
+        for link in topology.get('links', []):
+            source = link.get('source')
+            target = link.get('target')
+            sourceif = link.get('startPortName')
+            remoteif = link.get('endPortName')
+            if sourceif is not None and remoteif is not None:
+                index['links'].append({
+                    'sourcenode': source,
+                    'remotenode': target,
+                    'sourceif': sourceif,
+                    'remoteif': remoteif,
+                })
+
+            index['adjacency'].setdefault(source, []).append({
+                'remotenode': target,
+                'remoteif': remoteif,
+                'localif': sourceif,
+            })
+            if target != source:
+                index['adjacency'].setdefault(target, []).append({
+                    'remotenode': source,
+                    'remoteif': sourceif,
+                    'localif': remoteif,
+                })
+
+        self.loaded(index)
+
+    @property
+    def links(self):
+        """
+        Every link with both port names known, as returned by Device.getTopology
+        """
+        return [dict(link) for link in self.snapshot()['links']]
+
+    def node(self, nodeId):
+        return self.snapshot()['nodes'].get(nodeId)
+
+    def connections(self, nodeId):
+        """
+        Returns the links of a node as dicts with remotenode, remoteif and localif.
+        """
+        return [dict(link) for link in self.snapshot()['adjacency'].get(nodeId, [])]
+
+    def neighbors(self, nodeId):
+        """
+        Returns the ids of the nodes connected to nodeId, in link order.
+        """
+        neighbors = {}
+        for link in self.snapshot()['adjacency'].get(nodeId, []):
+            neighbors.setdefault(link['remotenode'], None)
+        return list(neighbors)
+
+    def neighbor_ifs(self, nodeId, neighbor):
+        """
+        Returns the interfaces on neighbor connected to nodeId.
+        """
+        interfaces = []
+        for link in self.snapshot()['adjacency'].get(nodeId, []):
+            if link['remotenode'] == neighbor:
+                interfaces.append(link['remoteif'])
+        return interfaces
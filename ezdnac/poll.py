@@ -0,0 +1,173 @@
+import concurrent.futures
+import asyncio
+import heapq
+import random
+import time
+
+
+class Backoff():
+    def __init__(self, interval=1, maxInterval=30, factor=2, jitter=0.25):
+        """
+        Exponential backoff with jitter, restarting from interval whenever
+        the polled object makes progress.
+
+        attributes
+        :interval (float) = first delay in seconds
+        :maxInterval (float) = upper bound of the delay
+        :factor (float) = growth of the delay while nothing changes
+        :jitter (float) = random spread of each delay, 0.25 is +-25%
+        """
+        self.interval = interval
+        self.maxInterval = maxInterval
+        self.factor = factor
+        self.jitter = jitter
+
+    def next(self, delay, progressed=False):
+        """
+        Returns the delay following delay.
+        """
+        if progressed or delay is None:
+            return self.interval
+        return min(delay * self.factor, self.maxInterval)
+
+    def sleeptime(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+def poll(ids, fetch, done, backoff=None, timeout=None, workers=10, key=None):
+    """
+    Generator polling many ids concurrently, yielding (id, result) as soon
+    as each id reaches a terminal state.
+
+    attributes
+    :ids (list) = ids to poll
+    :fetch (function) = fetch(id) returns the current state of id
+    :done (function) = done(result) is True once the state is terminal
+    :backoff (Backoff) = polling delays, default Backoff()
+    :timeout (float) = seconds before giving up, ids still running are then
+        yielded with their last result (None if never fetched)
+    :workers (int) = max number of fetches in flight
+    :key (function) = key(result) is compared between polls to detect progress
+    If fetch raises, the exception is yielded as the result of that id.
+    """
+    if backoff is None:
+        backoff = Backoff()
+    if key is None:
+        key = lambda result: result
+
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+    ids = list(dict.fromkeys(ids))
+    last = dict.fromkeys(ids)
+    delays = dict.fromkeys(ids)
+    queue = [(0, i, id) for i, id in enumerate(ids)]
+    counter = len(queue)
+    running = {}
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        while queue or running:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+
+            while queue and queue[0][0] <= now:
+                _, _, id = heapq.heappop(queue)
+                running[executor.submit(fetch, id)] = id
+
+            waittime = None
+            if queue:
+                waittime = queue[0][0] - now
+            if deadline is not None and (waittime is None or deadline - now < waittime):
+                waittime = deadline - now
+
+            if not running:
+                time.sleep(max(waittime, 0))
+                continue
+
+            finished, _ = concurrent.futures.wait(
+                running, timeout=waittime,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in finished:
+                id = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as error:
+                    yield id, error
+                    continue
+
+                if done(result):
+                    yield id, result
+                    continue
+
+                progressed = last[id] is None or key(result) != key(last[id])
+                last[id] = result
+                delays[id] = backoff.next(delays[id], progressed)
+                counter += 1
+                heapq.heappush(queue, (time.monotonic() + backoff.sleeptime(delays[id]), counter, id))
+
+        # Deadline passed, drop the fetches not started yet and report
+        # what is left with the last known state
+        executor.shutdown(wait=False, cancel_futures=True)
+        for id in running.values():
+            yield id, last[id]
+        for _, _, id in queue:
+            yield id, last[id]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def apoll(ids, fetch, done, backoff=None, timeout=None, key=None):
+    """
+    Async generator counterpart of poll, fetch being a coroutine function.
+    Concurrency is bounded by whatever fetch awaits, ex the AsyncDnac semaphore.
+    """
+    if backoff is None:
+        backoff = Backoff()
+    if key is None:
+        key = lambda result: result
+
+    ids = list(dict.fromkeys(ids))
+    last = dict.fromkeys(ids)
+
+    async def track(id):
+        result = None
+        delay = None
+        while True:
+            try:
+                current = await fetch(id)
+            except Exception as error:
+                return id, error
+            if done(current):
+                return id, current
+            progressed = result is None or key(current) != key(result)
+            result = current
+            last[id] = current
+            delay = backoff.next(delay, progressed)
+            await asyncio.sleep(backoff.sleeptime(delay))
+
+    tasks = {asyncio.ensure_future(track(id)): id for id in ids}
+    try:
+        pending = set(tasks)
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        while pending:
+            waittime = None
+            if deadline is not None:
+                waittime = max(deadline - time.monotonic(), 0)
+            finished, pending = await asyncio.wait(
+                pending, timeout=waittime, return_when=asyncio.FIRST_COMPLETED)
+            if not finished:
+                break
+            for task in finished:
+                yield task.result()
+
+        for task in pending:
+            yield tasks[task], last[tasks[task]]
+    finally:
+        for task in tasks:
+            task.cancel()
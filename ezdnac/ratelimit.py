@@ -0,0 +1,131 @@
+import email.utils
+import threading
+import time
+
+
+def retryAfter(value):
+    """
+    Returns the seconds asked for by a Retry-After header, None if unset.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(date.timestamp() - time.time(), 0)
+
+
+class Family():
+    def __init__(self, rate, burst, concurrency, maxConcurrency):
+        """
+        Limits the calls to one family of endpoints: a token bucket of rate
+        calls per second, and a concurrency limit growing by one call per
+        window of successes and halved on 429 and 5xx (AIMD).
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.pausedUntil = 0
+        self.limit = float(min(concurrency, maxConcurrency))
+        self.maxConcurrency = maxConcurrency
+        self.inflight = 0
+        self.decreased = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, deadline=None):
+        """
+        Blocks until a call may be sent. Returns False without acquiring
+        if deadline (time.monotonic() value) passes first.
+        """
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.rate is not None:
+                    self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+                    self.refilled = now
+
+                if now < self.pausedUntil:
+                    waittime = self.pausedUntil - now
+                elif self.inflight >= int(self.limit):
+                    waittime = None
+                elif self.rate is not None and self.tokens < 1:
+                    waittime = (1 - self.tokens) / self.rate
+                else:
+                    break
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    if waittime is None or waittime > deadline - now:
+                        waittime = deadline - now
+                self.condition.wait(waittime)
+
+            if self.rate is not None:
+                self.tokens -= 1
+            self.inflight += 1
+            return True
+
+    def release(self, status=None, retry=None):
+        """
+        Releases a call, adapting the limits to its status code.
+
+        attributes
+        :status (int) = status code, None if no response was received
+        :retry (str) = Retry-After header of the response
+        """
+        with self.condition:
+            self.inflight -= 1
+            now = time.monotonic()
+            if status == 429 or (status is not None and status >= 500):
+                # Halve at most once per second, calls in flight all fail together
+                if now - self.decreased > 1:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.decreased = now
+                delay = retryAfter(retry)
+                if status == 429 and delay is None:
+                    delay = 1
+                if delay is not None:
+                    self.pausedUntil = max(self.pausedUntil, now + delay)
+            elif status is not None and status < 400:
+                self.limit = min(self.maxConcurrency, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class RateLimiter():
+    def __init__(self, rate=10, burst=20, concurrency=4, maxConcurrency=10,
+                 retries=3):
+        """
+        Client side limiter of the calls made to DNAC, with one Family per
+        endpoint family (ex network-device, template-programmer).
+
+        attributes
+        :rate (float) = calls per second per family, None for no limit
+        :burst (int) = calls that may be sent at once after being idle
+        :concurrency (int) = calls in flight per family to start with
+        :maxConcurrency (int) = upper bound of the calls in flight per family
+        :retries (int) = times a call answered with 429 is sent again
+        """
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.maxConcurrency = maxConcurrency
+        self.retries = retries
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def family(self, endpoint):
+        """
+        Returns the Family of an endpoint, ex template-programmer for
+        template-programmer/template/{id}.
+        """
+        name = endpoint.split('?')[0].strip('/').split('/')[0]
+        with self.lock:
+            if name not in self.families:
+                self.families[name] = Family(self.rate, self.burst, self.concurrency,
+                                             self.maxConcurrency)
+            return self.families[name]
@@ -0,0 +1,32 @@
+from ezdnac.poll import Backoff
+import requests
+
+
+class RetryPolicy():
+    # Errors after which the call may be sent again
+    errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def __init__(self, retries=3, backoff=None, statuses=(502, 503, 504),
+                 methods=('GET', 'PUT', 'DELETE'), deadline=None):
+        """
+        When restcall sends a call again after a network error or a
+        transient status code.
+
+        attributes
+        :retries (int) = attempts after the first one
+        :backoff (Backoff) = delays between attempts, default 0.5s doubling up to 8s
+        :statuses (tuple) = status codes worth retrying
+        :methods (tuple) = methods retried by default. Other methods, like POST,
+            are only retried when restcall is called with idempotent=True
+        :deadline (float) = seconds a call may take, retries included, None for no limit
+        """
+        if backoff is None:
+            backoff = Backoff(interval=0.5, maxInterval=8)
+        self.retries = retries
+        self.backoff = backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.deadline = deadline
+
+    def allows(self, method, idempotent=False):
+        return idempotent or method in self.methods
@@ -0,0 +1,75 @@
+from ezdnac.utils import *
+from ezdnac.poll import *
+
+
+class DeploymentTracker():
+    # States a deployment passes through before it is finished
+    runningStates = ['INIT', 'IN_PROGRESS']
+
+    def __init__(self, dnac, deployments, callback=None, timeout=None,
+                 workers=10, backoff=None):
+        """
+        Follows many template deployments until each one is finished.
+
+        Input parameters
+        :dnac (ezdnac DnaC object)
+        :deployments (list) = deployment ids, or results of deployTemplate /
+            deploy_bulk. Results without a deploymentId are skipped.
+        :callback (function) = callback(deploymentId, data) on every finished
+            deployment, not called for deployments still running at timeout
+        :timeout (float) = seconds before giving up on running deployments
+        :workers (int) = max number of status requests in flight
+        :backoff (ezdnac Backoff obj) = polling delays
+        """
+        self.dnac = dnac
+        self.callback = callback
+        self.timeout = timeout
+        self.workers = workers
+        self.backoff = backoff
+        self.results = {}
+
+        if isinstance(deployments, dict):
+            deployments = deployments.values()
+        self.deploymentIds = []
+        for deployment in deployments:
+            if isinstance(deployment, dict):
+                deployment = deployment.get('deploymentId')
+            if deployment is not None and deployment not in self.deploymentIds:
+                self.deploymentIds.append(deployment)
+
+    def status(self, deploymentId):
+        endpoint = f"template-programmer/template/deploy/status/{deploymentId}"
+        return restcall('GET', self.dnac, endpoint)
+
+    @classmethod
+    def finished(cls, data):
+        if not isinstance(data, dict):
+            return True
+        return data.get('status') not in cls.runningStates
+
+    @staticmethod
+    def progress(data):
+        return data.get('status')
+
+    def __iter__(self):
+        """
+        Yields (deploymentId, data) as each deployment finishes. At timeout
+        the running ones are yielded with their last status, None if unknown.
+        """
+        completions = poll(self.deploymentIds, self.status, self.finished,
+                           backoff=self.backoff, timeout=self.timeout,
+                           workers=self.workers, key=self.progress)
+        for deploymentId, data in completions:
+            self.results[deploymentId] = data
+            finished = data is not None and self.finished(data)
+            if self.callback is not None and finished:
+                self.callback(deploymentId, data)
+            yield deploymentId, data
+
+    def run(self):
+        """
+        Waits for every deployment, returns {deploymentId: data}.
+        """
+        for _ in self:
+            pass
+        return self.results
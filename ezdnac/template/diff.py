@@ -0,0 +1,82 @@
+import hashlib
+import json
+
+# Keys set by DNAC on its own, left out of every comparison
+volatileKeys = ['id']
+
+
+def normalize(obj):
+    """
+    Returns a copy of obj without the volatile keys, at any depth.
+    """
+    if isinstance(obj, dict):
+        return {key: normalize(value) for key, value in obj.items()
+                if key not in volatileKeys}
+    if isinstance(obj, list):
+        return [normalize(value) for value in obj]
+    return obj
+
+
+def stableHash(obj):
+    """
+    Returns a sha256 of obj, independent of dict key order.
+    """
+    data = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def paramsByName(templateParams):
+    """
+    Returns the normalized template params as {parameterName: param}.
+    """
+    return {param['parameterName']: normalize(param)
+            for param in templateParams or []}
+
+
+def templateHash(templateContent, templateParams):
+    """
+    Returns a hash of the content and params of a template, equal for a
+    pulled template and the files it was written to.
+    """
+    return stableHash({
+        'templateContent': str(templateContent),
+        'templateParams': paramsByName(templateParams),
+    })
+
+
+def diffTemplates(fileContent, fileParams, liveContent, liveParams):
+    """
+    Compares a local template with the one on DNAC.
+
+    Returns differences (dict):
+    {
+    'content': (bool) True if the content differs,
+    'params': {parameterName: {key: (live value, file value)}},
+    'added': [parameterName] only in the file,
+    'removed': [parameterName] only on DNAC,
+    'changed': (bool) True if anything differs
+    }
+    """
+    fileParams = paramsByName(fileParams)
+    liveParams = paramsByName(liveParams)
+
+    differences = {
+        'content': str(fileContent) != str(liveContent),
+        'params': {},
+        'added': [name for name in fileParams if name not in liveParams],
+        'removed': [name for name in liveParams if name not in fileParams],
+    }
+
+    for name, fileParam in fileParams.items():
+        liveParam = liveParams.get(name)
+        if liveParam is None or stableHash(fileParam) == stableHash(liveParam):
+            continue
+        keys = {}
+        for key in set(fileParam) | set(liveParam):
+            if fileParam.get(key) != liveParam.get(key):
+                keys[key] = (liveParam.get(key), fileParam.get(key))
+        differences['params'][name] = keys
+
+    differences['changed'] = bool(differences['content'] or differences['params']
+                                  or differences['added'] or differences['removed'])
+    return differences
@@ -0,0 +1,501 @@
+from ezdnac.excepts import *
+from ezdnac.utils import *
+from ezdnac.template.diff import *
+import concurrent.futures
+import secrets
+import hashlib
+import json
+import os
+
+manifestFilename = ".ezdnac_manifest.json"
+
+# Keys of the project listing telling if a template changed on DNAC
+versionKeys = ['version', 'lastUpdateTime', 'latestVersionTime']
+
+
+def templateVersion(template):
+    """
+    Returns the version info of a template as listed under its project,
+    None if the listing carries none.
+    """
+    version = {key: template[key] for key in versionKeys if key in template}
+    return version or None
+
+
+def loadManifest(path):
+    """
+    Returns the manifest of a template folder as {templateId: entry},
+    empty if the folder has none.
+    """
+    try:
+        with open(os.path.join(path, manifestFilename)) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveManifest(path, manifest):
+    data = json.dumps(manifest, indent=4, sort_keys=True).encode()
+    writeFile(os.path.join(path, manifestFilename), data)
+
+
+def createTempFile(folder):
+    """
+    Creates a new hidden file in folder, returns (fd, filename). Unlike
+    mkstemp, the file gets the same mode as any new file (0666 minus umask).
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmpFilename = os.path.join(folder, ".tmp" + secrets.token_hex(8))
+        try:
+            return os.open(tmpFilename, flags, 0o666), tmpFilename
+        except FileExistsError:
+            continue
+
+
+def writeFile(filename, data):
+    """
+    Atomically replaces filename with data (bytes), unless it already holds
+    exactly these bytes. Returns True if the file was written.
+    """
+    try:
+        with open(filename, 'rb') as current:
+            if current.read() == data:
+                return False
+    except OSError:
+        pass
+
+    folder = os.path.dirname(filename) or "."
+    fd, tmpFilename = createTempFile(folder)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        # Keep the mode of the file replaced
+        try:
+            os.chmod(tmpFilename, os.stat(filename).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmpFilename, filename)
+    except BaseException:
+        os.unlink(tmpFilename)
+        raise
+    return True
+
+
+def templateFiles(path, name):
+    """
+    Returns the contents and params filenames of a template in path.
+    """
+    templatePath = os.path.join(path, name)
+    return (os.path.join(templatePath, name + "_contents.txt"),
+            os.path.join(templatePath, name + "_params.json"))
+
+
+def templateBytes(templateData):
+    """
+    Returns the contents and params files of a template, as bytes.
+    """
+    contents = str(templateData['templateContent']).encode()
+    templateParams = dict(templateData)
+    if 'templateContent' in templateParams:
+        del templateParams['templateContent']
+    params = json.dumps(templateParams, indent=4).encode()
+    return contents, params
+
+
+def contentHash(contents, params):
+    return hashlib.sha256(contents + b"\0" + params).hexdigest()
+
+
+def writeTemplate(path, templateData):
+    """
+    Writes a template as one subfolder, containing separate files for
+    parameters and content. Files already up to date are left untouched.
+
+    Returns (hash, changed) for the written files.
+    """
+    contents, params = templateBytes(templateData)
+    contentsFilename, paramsFilename = templateFiles(path, templateData['name'])
+    os.makedirs(os.path.dirname(contentsFilename), exist_ok=True)
+
+    changed = writeFile(contentsFilename, contents)
+    changed = writeFile(paramsFilename, params) or changed
+    return contentHash(contents, params), changed
+
+
+def pullTemplates(dnac, path="", project=None, workers=8, incremental=True):
+    """
+    Downloads templates from DNAC into path, fetching and writing up to
+    workers templates at a time. A template failing is reported and does
+    not stop the others.
+
+    A manifest in path records the version and content hash of every pulled
+    template. With incremental set, templates whose version in the project
+    listing is unchanged since the last pull are not downloaded again.
+
+    attributes
+    :dnac (ezdnac apic obj)
+    :path (str) = local folder for the templates
+    :project (str) = only pull the templates of this project
+    :workers (int) = number of templates pulled in parallel
+    :incremental (bool) = skip templates unchanged since the last pull
+    """
+    endpoint = "template-programmer/project"
+    response = restcall('GET', dnac, endpoint)
+
+    # Create template path folder if not exists already
+    if path != "":
+        os.makedirs(path, exist_ok=True)
+    manifest = loadManifest(path)
+
+    # Get the id of interesting templates, leaving out unchanged ones:
+    templates = {}
+    unchanged = 0
+    for projects in response:
+        if project is None or projects['name'] == project:
+            for template in projects['templates']:
+                version = templateVersion(template)
+                entry = manifest.get(template['id'])
+                if incremental and entry is not None and version is not None \
+                        and entry.get('version') == version \
+                        and all(os.path.exists(filename) for filename in
+                                templateFiles(path, entry['name'])):
+                    unchanged += 1
+                else:
+                    templates[template['id']] = version
+
+    def pull(templateId):
+        endpoint = f"template-programmer/template/{templateId}"
+        templateData = restcall('GET', dnac, endpoint)
+        return templateData, writeTemplate(path, templateData)
+
+    failures = {}
+    written = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(pull, templateId): templateId
+                   for templateId in templates}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            templateId = futures[future]
+            try:
+                templateData, (digest, changed) = future.result()
+            except Exception as error:
+                failures[templateId] = error
+            else:
+                written += changed
+                manifest[templateId] = {
+                    'name': templateData['name'],
+                    'projectName': templateData.get('projectName'),
+                    'version': templates[templateId],
+                    'hash': digest,
+                    'syncedHash': templateHash(templateData.get('templateContent'),
+                                               templateData.get('templateParams')),
+                }
+            print(f"\rPulled {done}/{len(templates)} templates, "
+                  f"{len(failures)} failed", end="", flush=True)
+    print()
+    print(f"{written} templates written, {unchanged} unchanged on DNAC")
+
+    if templates:
+        saveManifest(path, manifest)
+
+    for templateId, error in failures.items():
+        print(f"Failed to pull template {templateId}: {error!r}")
+
+    if path == "":
+        path = "local folder"
+    if failures:
+        return f"{len(failures)} of {len(templates) + unchanged} templates failed to sync to: {path}"
+    if project is not None:
+        return "All templates in project: " + project + " are synced to: " + path
+    else:
+        return "All templates in all projects are synced to: " + path
+
+
+class ProjectIndex():
+    def __init__(self, projects):
+        """
+        Index of the DNAC template projects, built from one listing of
+        template-programmer/project and kept up to date as projects and
+        templates are created.
+
+        attributes
+        :projects (list) = response of template-programmer/project
+        """
+        self.projects = {}
+        self.templates = {}
+        for project in projects:
+            self.addProject(project['name'], project['id'])
+            for template in project.get('templates', []):
+                self.addTemplate(project['name'], template['name'], template['id'])
+
+    def addProject(self, projectName, projectId):
+        self.projects[projectName] = projectId
+
+    def addTemplate(self, projectName, templateName, templateId):
+        self.templates[(projectName, templateName)] = templateId
+
+    def projectId(self, projectName):
+        return self.projects.get(projectName)
+
+    def templateId(self, projectName, templateName):
+        return self.templates.get((projectName, templateName))
+
+
+def listTemplateFolders(path):
+    """
+    Returns a reference dict for each template folder in path, with the
+    name of the folder and its params and contents files.
+    """
+    templatesList = []
+    for folder in os.listdir(path):
+        if folder.startswith("."):
+            continue
+
+        templateDict = {"name": folder}
+        templatePath = os.path.join(path, folder)
+        for file in os.listdir(templatePath):
+            if file.endswith('_params.json'):
+                templateDict['paramsFile'] = os.path.join(templatePath, file)
+
+            if file.endswith('_contents.txt'):
+                templateDict['contentsFile'] = os.path.join(templatePath, file)
+
+        templatesList.append(templateDict)
+    return templatesList
+
+
+def createProjects(dnac, index, projectNames, log=print):
+    """
+    Creates the projects, then waits for all of them at once and adds the
+    new ids to the index. Returns {projectName: projectId}, None for the
+    projects DNAC failed to create.
+    """
+    baseurl = "/dna/intent/api/v1/"
+    endpoint = "template-programmer/project"
+
+    tasks = {}
+    for projectName in projectNames:
+        log("Creating missing project: " + projectName)
+        payload = {
+            "name": projectName,
+        }
+        data = restcall('POST', dnac, endpoint, baseurl=baseurl, jsondata=payload)
+        try:
+            tasks[data['response']['taskId']] = projectName
+        except (KeyError, TypeError):
+            log(f"Failed to create project {projectName}: {data}")
+
+    # Since the projects didn't exist, we need to fetch their new ids.
+    projectIds = dict.fromkeys(projectNames)
+    results = dnac.wait_for(task_ids=list(tasks))
+    for taskId, result in results.items():
+        projectName = tasks[taskId]
+        if result['finished'] and not result['isError']:
+            projectIds[projectName] = result['data']
+            index.addProject(projectName, result['data'])
+        else:
+            log(f"Failed to create project {projectName}: {result.get('failureReason')}")
+    return projectIds
+
+
+def createTemplate(dnac, index, projectId, templateFile, templateContents,
+                   log=print):
+    """
+    Creates a template in a project, returns the taskId of the creation.
+    """
+    templateName = templateFile['name']
+    log("Creating missing template: " + templateName)
+
+    baseurl = "/dna/intent/api/v1/"
+    endpoint = f"template-programmer/project/{projectId}/template"
+    payload = dict(templateFile)
+    # Remove keys, making the payload suitable for new-creation of template. Hence removing id etc.
+    if 'id' in payload:
+        del payload['id']
+    payload['templateParams'] = [
+        {key: value for key, value in param.items() if key not in ['id', 'selection']}
+        for param in payload.get('templateParams', [])]
+    payload['templateContent'] = str(templateContents)
+
+    data = restcall('POST', dnac, endpoint, baseurl=baseurl, jsondata=payload)
+    try:
+        taskId = data['response']['taskId']
+    except (KeyError, TypeError):
+        return None
+
+    # Keep the index in sync, in case the same template is pushed again
+    result = dnac.wait_for(task_ids=[taskId])[taskId]
+    if result['finished'] and not result['isError']:
+        index.addTemplate(templateFile['projectName'], templateName, result['data'])
+    return taskId
+
+
+def updateTemplate(dnac, templateId, templateFile, templateContents, log=print):
+    """
+    Compares a template with its version on DNAC, versioning and
+    updating it if anything differs. Returns True if it was updated.
+    The version and update calls are made in that order.
+    """
+    templateName = templateFile['name']
+    log("Template " + templateName +
+           " already exists, compare data")
+
+    #Get the current data from dna-C
+    template_endpoint = f"template-programmer/template/{templateId}"
+    dnac_template = restcall('GET', dnac, template_endpoint)
+
+    differences = diffTemplates(templateContents, templateFile.get('templateParams'),
+                                dnac_template.get('templateContent'),
+                                dnac_template.get('templateParams'))
+
+    # Check if content is matching.
+    if differences['content']:
+        log(f"Content update in {templateName}, updating.")
+    else:
+        log(f"Same Template Content in {templateName}")
+
+    for name, keys in differences['params'].items():
+        for key, (live, file) in keys.items():
+            log(f"Template differs for parameter {name} {key}, live value: {live} file value: {file}")
+    for name in differences['added']:
+        log(f"Template parameter {name} only in file")
+    for name in differences['removed']:
+        log(f"Template parameter {name} only in DNA-C")
+
+    if differences['changed']:
+        log("Updating..")
+
+        # Version template first.
+        versionEndpoint = "template-programmer/template/version"
+        versionPayload = {
+            'comments': 'Updated with EZDNAC',
+            'templateId': templateId
+        }
+        # Restcall for template versioning
+        restcall('POST', dnac, versionEndpoint, jsondata=versionPayload)
+
+        #Update the current template:
+        templateEndpoint = "template-programmer/template/"
+        payload = dict(templateFile)
+        payload['id'] = templateId
+        payload['templateParams'] = [
+            {key: value for key, value in param.items() if key not in ['id', 'selection']}
+            for param in payload.get('templateParams', [])]
+        payload['templateContent'] = templateContents
+
+        # Sending the updates to DNA-C
+        restcall('PUT', dnac, templateEndpoint, jsondata=payload)
+
+    # If nothing changed, do nothing
+    else:
+        log("No parameter updated \nNo update done")
+
+    return differences['changed']
+
+
+def pushTemplates(dnac, path="", force=False, workers=8):
+    """
+    Uploads the template folders in path to DNAC, creating missing
+    projects and templates and updating the ones that differ.
+    The project tree is fetched once per push. Missing projects are
+    created first, then up to workers templates are pushed in parallel.
+
+    The manifest in path records a hash of each template as last pulled or
+    pushed. Templates whose files still match it are skipped without any
+    call to DNAC, unless force is set.
+
+    attributes
+    :dnac (ezdnac apic obj)
+    :path (str) = local folder with the templates, as written by pullTemplates
+    :force (bool) = compare every template with DNAC
+    :workers (int) = number of templates pushed in parallel
+    """
+    manifest = loadManifest(path)
+
+    # Check whats already existing, based on project/template tree name
+    endpoint = "template-programmer/project/"
+    index = ProjectIndex(restcall('GET', dnac, endpoint))
+
+    templates = []
+    for template in listTemplateFolders(path):
+
+        # Opening both files
+        # Content from the _content.json file:
+        # Read as written at pull, text mode would turn \r\n into \n
+        with open(template['contentsFile'], 'r', newline='', encoding='utf-8') as contents:
+            templateContents = str(contents.read())
+
+        # All parameters from the params file:
+        with open(template['paramsFile']) as templateData:
+            templateFile = json.load(templateData)
+        templateName = templateFile['name']
+        projectName = templateFile['projectName']
+
+        templateId = index.templateId(projectName, templateName)
+        localHash = templateHash(templateContents, templateFile.get('templateParams'))
+
+        entry = manifest.get(templateId)
+        if not force and entry is not None and entry.get('syncedHash') == localHash:
+            print ("Template " + templateName + " unchanged since last sync, skipping.")
+            continue
+
+        templates.append((templateFile, templateContents, localHash))
+
+    # Projects first, every template below depends on its project id
+    missingProjects = []
+    for templateFile, _, _ in templates:
+        projectName = templateFile['projectName']
+        if index.projectId(projectName) is None and projectName not in missingProjects:
+            missingProjects.append(projectName)
+    if missingProjects:
+        createProjects(dnac, index, missingProjects)
+
+    def push(templateFile, templateContents):
+        log = []
+        templateName = templateFile['name']
+        projectName = templateFile['projectName']
+        projectId = index.projectId(projectName)
+        templateId = index.templateId(projectName, templateName)
+
+        if projectId is None:
+            raise ezDNACError(f"project {projectName} could not be created")
+
+        log.append("Project exists: " + projectName + " - " + projectId)
+        if templateId is None:
+            dnac.taskId = createTemplate(dnac, index, projectId, templateFile,
+                                         templateContents, log=log.append)
+            templateId = index.templateId(projectName, templateName)
+        else:
+            log.append("Template exists: " + templateName + " - " + templateId)
+            updateTemplate(dnac, templateId, templateFile, templateContents,
+                           log=log.append)
+        return templateId, log
+
+    failures = {}
+    manifestChanged = False
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(push, templateFile, templateContents):
+                   (templateFile, localHash)
+                   for templateFile, templateContents, localHash in templates}
+        for future in concurrent.futures.as_completed(futures):
+            templateFile, localHash = futures[future]
+            templateName = templateFile['name']
+            try:
+                templateId, log = future.result()
+            except Exception as error:
+                failures[templateName] = error
+                print(f"Failed to push template {templateName}: {error!r}\r\n")
+                continue
+
+            print("\n".join(log) + "\r\n")
+
+            # DNAC now holds what the files hold
+            if templateId is not None:
+                manifest.setdefault(templateId, {'name': templateName,
+                                                 'projectName': templateFile['projectName']})
+                manifest[templateId]['syncedHash'] = localHash
+                manifestChanged = True
+
+    if manifestChanged:
+        saveManifest(path, manifest)
+    return failures
@@ -1,10 +1,6 @@
 from ezdnac.excepts import *
 from ezdnac.utils import *
-import ezdnac.dnac
-import requests
-import json
-import re
-import os
+from ezdnac.template.sync import pullTemplates, pushTemplates
 
 
 
@@ -82,6 +78,57 @@ class Template():
         data = restcall('GET', self.dnac, endpoint)
         return data
 
+    def deploy_bulk(self, devices, params=None, chunk_size=50):
+        """
+        Deploys the template to many devices, packing up to chunk_size
+        targets in each deploy request.
+
+        Inputs:
+        devices (list) ezdnac device objects or device ids
+        params (dict) per device params as {deviceId: params},
+            devices not in it are deployed with the template params
+        chunk_size (int) targets per request
+
+        Returns (dict) {deviceId: data} where data is the parsed deployment
+        of the device's chunk, see Device.deployTemplate. A chunk whose
+        request failed has deployed False and the exception as message.
+        """
+        endpoint = "template-programmer/template/deploy"
+        if params is None:
+            params = {}
+
+        deviceIds = []
+        for device in devices:
+            if isinstance(device, str):
+                deviceIds.append(device)
+            else:
+                deviceIds.append(device.id)
+
+        result = {}
+        for i in range(0, len(deviceIds), chunk_size):
+            chunk = deviceIds[i:i + chunk_size]
+            payload = {
+                "forcePushTemplate": self.force,
+                "templateId": self.id,
+                "targetInfo": [
+                    {
+                        "id": deviceId,
+                        "type": "MANAGED_DEVICE_UUID",
+                        "params": params.get(deviceId, self.params)
+                    } for deviceId in chunk
+                ]}
+
+            try:
+                response = restcall('POST', self.dnac, endpoint, jsondata=payload)
+                data = parseDeployment(response)
+            except Exception as e:
+                # Keep the chunks already deployed, report this one as failed
+                data = {'deploymentId': None, 'deployed': False, 'message': e}
+            for deviceId in chunk:
+                result[deviceId] = dict(data)
+
+        return result
+
     def newVersion(self):
         endpoint = "template-programmer/template/version"
         payload = {
@@ -91,207 +138,36 @@ class Template():
         data = restcall('POST', self.dnac, endpoint, jsondata=payload)
 
     def pullTemplates(self, **kwargs):
-        path = ""
-        projectName = None
-        try:
-            projectName = kwargs['project']
-        except:
-            pass
-        try:
-            path = kwargs['path']
-        except:
-            pass
-
-        endpoint = "template-programmer/project"
-        data = restcall('GET', self.dnac, endpoint)
-
-        templateslist = []
-        # Get the id of interesting templates:
-        for projects in data:
-            if projectName is not None:
-                if (projects['name']) == projectName:
-                    for template in projects['templates']:
-                        templates = {}
-                        templates['id'] = template['id']
-                        templateslist.append(templates)
-            else:
-                for template in projects['templates']:
-                    templates = {}
-                    templates['id'] = template['id']
-                    templateslist.append(templates)
-
-        for template in templateslist:
-            url = "https://" + self.ip + ":" + self.port + baseurl + \
-                "template-programmer/template/" + template['id']
-
-            templateEndpoint = "template-programmer/template/" + template['id']
-            templateData = restcall('GET', self.dnac, templateEndpoint)
-
-            # Create template path folder if not exists already
-            if not os.path.exists(path):
-                os.mkdir(path)
-
-            # Creates one subfolder per template, containting separate files for parameters and content
-            templatePath = path + templateData['name']
-            if not os.path.exists(templatePath):
-                os.mkdir(templatePath)
-
-            # Create a file for the actual content:
-            contentsFilename = templatePath + "/" + \
-                templateData['name'] + "_contents.txt"
-            with open(contentsFilename, 'w') as out:
-                templateParams = templateData['templateContent']
-                out.write(str(templateParams))
+        """
+        Downloads templates to a local folder.
 
-            # Create a file for all parameters:
-            paramsFilename = templatePath + "/" + \
-                templateData['name'] + "_params.json"
-            with open(paramsFilename, 'w') as out:
-                templateParams = templateData
-                if 'templateContent' in templateParams:
-                    del templateParams['templateContent']
-                out.write(str(json.dumps(templateParams, indent=4)))
+        Input parameters
+        :kwargs['path'] = STRING # local folder, default current folder
+        :kwargs['project'] = STRING # only pull the templates of this project
+        :kwargs['workers'] = INT # templates pulled in parallel, default 8
+        :kwargs['incremental'] = Boolean # skip templates unchanged since last pull, default True
+        """
+        path = kwargs.get('path', "")
+        projectName = kwargs.get('project')
+        workers = kwargs.get('workers', 8)
+        incremental = kwargs.get('incremental', True)
 
-        if path == "":
-            path = "local folder"
-        if projectName is not None:
-            return "All templates in project: " + projectName + " are synced to: " + path
-        else:
-            return "All templates in all projects are synced to: " + path
+        return pullTemplates(self.dnac, path=path, project=projectName, workers=workers,
+                             incremental=incremental)
 
     def pushTemplates(self, **kwargs):
-        path = ""
-        try:
-            path = kwargs['path']
-        except:
-            pass
-
-        # Createa a reference dict for each templatefolder:
-        templatesList = []
-        listdir = os.listdir(path)
-        folders = []
-        for obj in listdir:
-            if not re.match(r"^\.", obj):
-                folders.append(obj)
-
-        for folder in folders:
-            templateDict = {"name": folder}
-            templateName = folder
-            templatePath = path + folder
-
-            for file in os.listdir(path + folder):
-                if re.match(r'.*_params.json', file):
-                    templateDict['paramsFile'] = templatePath + "/" + file
-
-                if re.match(r'.*_contents.txt', file):
-                    templateDict['contentsFile'] = templatePath + "/" + file
-
-            templatesList.append(templateDict)
-        print(templateDict)
-
-        # Firest check if template already exists:
-        for template in templatesList:
-
-            # Opening both files
-            # Content from the _content.json file:
-            templateContents = str(open(template['contentsFile'], 'r').read())
-
-            # All parameters from the params file:
-            with open(template['paramsFile']) as templateData:
-                templateFile = json.load(templateData)
-                templateName = templateFile['name']
-                projectName = templateFile['projectName']
-
-                # Check whats already existing, based on project/template tree name
-                endpoint = "template-programmer/project/"
-
-                data = restcall('GET', self.dnac, endpoint)
-
-                templateExists = False
-                projectExists = False
-                for project in data:
-                    if project['name'] == projectName:
-                        projectExists = True
-                        projectId = project['id']
-                        print ("Project exists: " +
-                               projectName + " - " + projectId)
-
-                        for templates in project['templates']:
-                            if templates['name'] == templateName:
-                                templateId = templates['id']
-                                templateExists = True
-                                print ("Template exists: " +
-                                       templateName + " - " + templateId)
-
-                if projectExists == False:
-                    print ("Creating missing project: " + projectName)
-                    endpoint = "template-programmer/project"
-
-                    payload = {
-                        "name": projectName,
-                    }
-
-                    data = restcall('POST', self.dnac, endpoint, json=payload)
-
-                    # Since the project didn't exist, we need to fetch it's new id.
-                    taskId = data['response']['taskId']
-                    datafromtask = self.taskStatus(id=taskId)
-                    projectId = datafromtask['data']
-
-                if templateExists == False:
-                    print ("Creating missing template: " + templateName)
-
-                    endpoint = "template-programmer/project/" + projectId + "/template"
-                    payload = templateFile
-                    # Remove keys, making the payload suitable for new-creation of template. Hence removing id etc.
-                    if 'id' in payload:
-                        del payload['id']
-                    for param in payload['templateParams']:
-                        if 'id' in param:
-                            del param['id']
-
-                    for param in payload['templateParams']:
-                        if 'selection' in param:
-                            del param['selection']
-
-                    payload['templateContent'] = str(templateContents)
-
-                    data = restcall('POST', self.dnac, endpoint, json=payload)
-
-                    try:
-                        self.taskId = data['response']['taskId']
-                    except:
-                        self.taskId = None
-
-                if templateExists == True:
-                    # Since the template exists, PUT the file from directory to make sure the active template is same version.
-                    print ("Template " + templateName +
-                           " already exists, versioning and updating.")
-
-                    headers = {
-                        'x-auth-token': self.authToken,
-                        'Content-Type': 'application/json',
-                    }
-
-                    versionEndpoint = "template-programmer/template/version"
-                    versionPayload = {
-                        'comments': 'Updated with EZDNAC',
-                        'templateId': templateId
-                    }
-
-                    restcall('POST', self.dnac, versionEndpoint, json=versionPayload)
-
-                    endpoint = "template-programmer/template/"
-                    payload = templateFile
-                    payload['id'] = templateId
-
-                    for params in payload['templateParams']:
-                        del params['id']
+        """
+        Uploads local template folders to DNAC.
 
-                    for param in payload['templateParams']:
-                        if 'selection' in param:
-                            del param['selection']
+        Input parameters
+        :kwargs['path'] = STRING # local folder, as written by pullTemplates
+        :kwargs['force'] = Boolean # compare templates unchanged since last sync too
+        :kwargs['workers'] = INT # templates pushed in parallel, default 8
 
-                    payload['templateContent'] = templateContents
+        Returns (dict) {templateName: error} for the templates that failed
+        """
+        path = kwargs.get('path', "")
+        force = kwargs.get('force', False)
+        workers = kwargs.get('workers', 8)
 
-                    data = restcall('PUT', self.dnac, endpoint, json=payload)
+        return pushTemplates(self.dnac, path=path, force=force, workers=workers)
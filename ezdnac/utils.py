@@ -1,19 +1,206 @@
 import requests
+import requests.adapters
+import concurrent.futures
+import urllib.parse
+import codecs
 import json
+import time
+import re
+
+# Faster JSON decoding, when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def create_session(pool_size=10):
+    """
+    Returns a requests session keeping a pool of keep-alive connections
+    towards DNAC.
+
+    attributes
+    :pool_size (int) = max number of connections kept open per host
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                            pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    return session
+
+
+def loads(data):
+    """
+    Decodes JSON straight from the bytes of a response, with orjson if
+    it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def restcall(method, dnac, endpoint, **kwargs):
-    baseurl = '/api/v1/'
     """
     General function for restcalls to DNAC
 
+    attributes
+    :mehtod (str) = POST/GET/PUT/DELETE
+    :dnac (ezdnac apic obj)
+    :endpoint(str) = endpoint ex: template-programmer/template/
+    further kwargs as for send
+    """
+    if method not in ['GET', 'PUT', 'POST', 'DELETE']:
+        return "Invalid rest method"
+
+    response = send(method, dnac, endpoint, **kwargs)
+    jsondata = loads(response.content)
+    return jsondata
+
+
+def restcall_stream(method, dnac, endpoint, key='response', chunk_size=65536, **kwargs):
+    """
+    Generator version of restcall for huge list responses, yielding the
+    items of the list one by one while the body is still being received.
+    Only the item being parsed is held in memory.
+
+    attributes
+    :key (str) = top level key holding the list, None if the body is the list
+    :chunk_size (int) = bytes read from the connection at a time
+    further kwargs as for send
+    """
+    response = send(method, dnac, endpoint, stream=True, **kwargs)
+    try:
+        yield from iterJsonItems(response.iter_content(chunk_size), key)
+    finally:
+        response.close()
+
+
+def iterJsonItems(chunks, key=None):
+    """
+    Incremental parser yielding the items of a JSON list, from an iterable
+    of bytes. The list is the whole document, or the value of key in the
+    top level object. Keys of nested objects are not matched.
+    """
+    decoder = json.JSONDecoder()
+    textDecoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ""
+    eof = False
+
+    def more():
+        nonlocal buffer, eof
+        try:
+            buffer += textDecoder.decode(next(chunks))
+        except StopIteration:
+            buffer += textDecoder.decode(b"", final=True)
+            eof = True
+
+    # Find where the list starts, scanning the document structure so that
+    # only a key of the top level object matches
+    position = 0
+    depth = 0
+    inString = False
+    escaped = False
+    stringStart = None
+    lastString = None
+    afterColon = False
+    while True:
+        if position == len(buffer):
+            if eof:
+                return
+            more()
+            continue
+        char = buffer[position]
+        position += 1
+
+        if inString:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                inString = False
+                if depth == 1:
+                    lastString = buffer[stringStart:position]
+            continue
+        if char in ' \t\r\n':
+            continue
+
+        if key is None:
+            if char == '[':
+                break
+            return
+
+        if afterColon:
+            afterColon = False
+            if char == '[' and depth == 1 and json.loads(lastString) == key:
+                break
+        if char == ':':
+            afterColon = True
+            continue
+        lastString = None
+        if char == '"':
+            inString = True
+            stringStart = position - 1
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+    buffer = buffer[position:]
+
+    while True:
+        # Skip to the next item
+        position = 0
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        buffer = buffer[position:]
+        if buffer.startswith(']'):
+            return
+        if not buffer:
+            if eof:
+                raise ValueError('JSON list not terminated')
+            more()
+            continue
+
+        # An item is complete only once the next separator is received,
+        # a number cut by a chunk boundary would otherwise be yielded short
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            end = None
+        if end is not None:
+            following = end
+            while following < len(buffer) and buffer[following] in ' \t\r\n':
+                following += 1
+            if following < len(buffer) and buffer[following] in ',]':
+                yield item
+                buffer = buffer[following:]
+                continue
+        if eof:
+            if end is None or following < len(buffer):
+                raise ValueError('Invalid JSON item')
+            raise ValueError('JSON list not terminated')
+        more()
+
+
+def send(method, dnac, endpoint, **kwargs):
+    """
+    Sends a call to DNAC and returns the requests response. The call goes
+    through the rate limiter, and is retried as the retry policy allows.
+
     attributes
     :mehtod (str) = POST/GET/PUT/DELETE
     :dnac (ezdnac apic obj)
     :endpoint(str) = endpoint ex: template-programmer/template/
     :data = payload to be sent as data
     :json = payload to be sent as json
+    :headers = extra headers
+    :retry (RetryPolicy) = overrides the retry policy of dnac
+    :idempotent (bool) = the call may be retried whatever its method
+    :deadline (float) = seconds the call may take, retries included
+    :stream (bool) = leave the body unread, to be streamed
     """
+    baseurl = '/api/v1/'
     if 'data' in kwargs:
         data = kwargs['data']
     else:
@@ -24,24 +211,259 @@ def restcall(method, dnac, endpoint, **kwargs):
     else:
         jsondata = {}
 
+    # Extra headers, added to the auth and content-type ones
     if 'headers' in kwargs:
-        headers = kwargs['headers']
+        extraHeaders = kwargs['headers']
     else:
-        headers = {
-        'x-auth-token': dnac.authToken,
-        'Content-Type': 'application/json'
-        }
+        extraHeaders = {}
 
     if 'baseurl' in kwargs:
         baseurl = kwargs['baseurl']
 
-    if method not in ['GET', 'PUT', 'POST', 'DELETE']:
-        return "Invalid rest method"
+    policy = kwargs.get('retry', dnac.retry)
+    retryable = policy.allows(method, kwargs.get('idempotent', False))
+    deadline = kwargs.get('deadline', policy.deadline)
+    if deadline is not None:
+        deadline = time.monotonic() + deadline
 
     url = f'https://{dnac.ip}:{dnac.port}{baseurl}{endpoint}'
-    response = requests.request(method, url, headers=headers, data=data,
-                                json=jsondata, verify=dnac.verifySSL,
-                                timeout=dnac.timeout)
+    family = dnac.limiter.family(endpoint)
+    token = dnac.tokens.ensure()
+    reauthed = False
+    throttled = 0
+    attempt = 0
+    delay = None
+    while True:
+        headers = {
+        'x-auth-token': token,
+        'Content-Type': 'application/json'
+        }
+        headers.update(extraHeaders)
 
-    jsondata = json.loads(response.text)
-    return jsondata
+        timeout = dnac.timeout
+        if deadline is not None:
+            timeout = max(min(timeout, deadline - time.monotonic()), 0.001)
+
+        if not family.acquire(deadline):
+            raise requests.exceptions.Timeout(
+                f'Deadline passed waiting to send {method} {endpoint}')
+        try:
+            response = dnac.session.request(method, url, headers=headers, data=data,
+                                            json=jsondata, verify=dnac.verifySSL,
+                                            timeout=timeout,
+                                            stream=kwargs.get('stream', False))
+        except policy.errors:
+            family.release()
+            delay = policy.backoff.next(delay)
+            if not retryable or not retryWithin(policy, attempt, delay, deadline):
+                raise
+            attempt += 1
+            continue
+        except Exception:
+            family.release()
+            raise
+        family.release(response.status_code, response.headers.get('Retry-After'))
+
+        # An expired token is renewed once and the call sent again
+        if response.status_code == 401 and not reauthed and dnac.tokens.canRefresh:
+            response.close()
+            token = dnac.tokens.refresh(stale=token)
+            reauthed = True
+            continue
+
+        # Throttled calls were not processed, the limiter waits out Retry-After
+        if response.status_code == 429 and throttled < dnac.limiter.retries:
+            if deadline is not None and family.pausedUntil >= deadline:
+                break
+            throttled += 1
+            response.close()
+            continue
+
+        if response.status_code in policy.statuses and retryable:
+            delay = policy.backoff.next(delay)
+            if retryWithin(policy, attempt, delay, deadline):
+                attempt += 1
+                response.close()
+                continue
+        break
+
+    return response
+
+
+def retryWithin(policy, attempt, delay, deadline):
+    """
+    Sleeps before the next attempt of a call, returns False instead if
+    the attempts are used up or the deadline would pass.
+    """
+    if attempt >= policy.retries:
+        return False
+    sleeptime = policy.backoff.sleeptime(delay)
+    if deadline is not None and time.monotonic() + sleeptime >= deadline:
+        return False
+    time.sleep(sleeptime)
+    return True
+
+def paginate(dnac, endpoint, page_size=500, filters=None, prefetch=False,
+             offset=1, **kwargs):
+    """
+    Generator walking a list endpoint page by page with offset/limit,
+    yielding one item at a time.
+
+    attributes
+    :dnac (ezdnac apic obj)
+    :endpoint(str) = endpoint ex: network-device
+    :page_size (int) = items requested per call, the server may return less
+    :filters (dict) = extra query parameters
+    :prefetch (bool) = fetch the next page while the current one is consumed
+    :offset (int) = index of the first item, DNAC counts from 1 on most APIs
+    remaining kwargs are passed to restcall
+    """
+    def fetch(offset):
+        params = dict(filters or {})
+        params['offset'] = offset
+        params['limit'] = page_size
+        separator = '&' if '?' in endpoint else '?'
+        query = urllib.parse.urlencode(params)
+        data = restcall('GET', dnac, f'{endpoint}{separator}{query}', **kwargs)
+        if isinstance(data, dict):
+            data = data.get('response', [])
+        return data
+
+    # The server may cap the page below page_size, so only an empty page
+    # ends the list. An endpoint ignoring offset/limit returns the whole
+    # list every time, seen as a page longer than page_size or a repeat
+    # of the previous page.
+    def pages():
+        nonlocal offset
+        previous = None
+        following = None
+        executor = None
+        if prefetch:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            page = fetch(offset)
+            while page and page != previous:
+                following = None
+                if len(page) <= page_size:
+                    offset += len(page)
+                    if executor is not None:
+                        following = executor.submit(fetch, offset)
+                yield page
+                if len(page) > page_size:
+                    return
+                previous = page
+                if following is not None:
+                    page = following.result()
+                else:
+                    page = fetch(offset)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    walk = pages()
+    try:
+        for page in walk:
+            yield from page
+    finally:
+        walk.close()
+
+
+def parseDeployment(response):
+    """
+    Parses the response of template-programmer/template/deploy.
+
+    Returns data (dict):
+    {
+    'deploymentId': id(str),   if error occurs, deploymentId returns None.
+    'deployed': (bool),
+    'message': (str)
+    }
+    """
+    data = {}
+    data['deploymentId'] = None
+    data['message'] = None
+
+    # If error occurs, no id
+    if 'response' in response and 'errorCode' in response['response']:
+        data['message'] = response['response']
+        data['deployed'] = False
+        return data
+
+    deploymentId = response.get('deploymentId')
+
+    # This is how the id should be found, if the API wasnt broken.
+    if type(deploymentId) is int:
+        data['deploymentId'] = deploymentId
+        data['message'] = 'Id found in response'
+        data['deployed'] = True
+        return data
+
+    # This is how it is solved with regex instead.
+    if type(deploymentId) is str:
+        resultRegex = re.search(r'Template Deployemnt Id:\s*([\w-]+)', deploymentId)
+        if resultRegex is not None:
+            data['deploymentId'] = resultRegex.group(1)
+            data['message'] = 'Id found with regex, broken response'
+            data['deployed'] = True
+            return data
+
+        # If template was not deployed
+        if re.match(r'.*already deployed with same params.*', deploymentId):
+            data['deployed'] = True
+            data['message'] = 'Same version already deployed with same params'
+            return data
+
+    data['deployed'] = False
+    data['message'] = response
+    return data
+
+
+def parseTask(response):
+    """
+    Parses the response of task/{id}.
+
+    Returns data (dict):
+    {
+    'finished': (bool),
+    'isError': (bool),
+    'data': (str) ex: the id of a created object,
+    'progress': (str),
+    'failureReason': (str),
+    'response': (dict) the task as returned by DNAC
+    }
+    """
+    task = response.get('response', response)
+    if not isinstance(task, dict):
+        task = {}
+    isError = bool(task.get('isError', 'errorCode' in task))
+    return {
+        'finished': isError or 'endTime' in task,
+        'isError': isError,
+        'data': task.get('data'),
+        'progress': task.get('progress'),
+        'failureReason': task.get('failureReason'),
+        'response': task,
+    }
+
+
+def parseExecution(response):
+    """
+    Parses the response of execution-status/{id}.
+
+    Returns data (dict):
+    {
+    'finished': (bool),
+    'isError': (bool),
+    'status': (str) ex: SUCCESS/FAILURE/IN_PROGRESS,
+    'bapiError': (str),
+    'response': (dict) the execution as returned by DNAC
+    }
+    """
+    status = response.get('status')
+    return {
+        'finished': status not in ['IN_PROGRESS', 'PENDING'],
+        'isError': status != 'SUCCESS',
+        'status': status,
+        'bapiError': response.get('bapiError'),
+        'response': response,
+    }
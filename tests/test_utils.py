@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from ezdnac.utils import iterJsonItems
+
+
+def chunked(document, size):
+    data = document.encode()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', range(1, 40))
+def test_number_split_by_chunk(size):
+    document = '{"response": [2.5, {"x": 1}, 1.5e3, -0.25, true, null, "a,]"]}'
+    items = list(iterJsonItems(chunked(document, size), 'response'))
+    assert items == json.loads(document)['response']
+
+
+@pytest.mark.parametrize('size', range(1, 30))
+def test_list_document(size):
+    document = '[{"x":1},1.5e3]'
+    assert list(iterJsonItems(chunked(document, size))) == [{'x': 1}, 1500.0]
+
+
+@pytest.mark.parametrize('size', range(1, 50))
+def test_nested_key_not_matched(size):
+    document = '{"meta":{"response":[9]},"list":["response"],"response":[1, 22]}'
+    assert list(iterJsonItems(chunked(document, size), 'response')) == [1, 22]
+
+
+def test_missing_key():
+    assert list(iterJsonItems(chunked('{"other": [1]}', 3), 'response')) == []
+
+
+def test_not_terminated():
+    with pytest.raises(ValueError):
+        list(iterJsonItems(chunked('{"response": [1, 2', 3), 'response'))